@@ -1,79 +1,152 @@
 #!/usr/bin/env python3
 """Diagnostic test - Check for common issues and glitches"""
 
+import io
 import sys
 import os
-import json
-from pathlib import Path
+import stat
+from functools import partial
+from types import MappingProxyType
+
+SEP = "=" * 70
+RULE = "\n" + SEP
+
+# Status prefixes for individual check results
+OK = "   ✓ "
+BAD = "   ✗ "
+WARN = "   ⚠  "
+INFO = "   ℹ  "
+
+# Known issues from USAGE_GUIDE and how they were resolved
+_KNOWN_ISSUES = MappingProxyType({
+    "API Keys Disappearing": "Fixed in enhanced version with encrypted storage",
+    "HuggingFace 400 Errors": "Fixed with improved API handling",
+    "Model Loading Issues": "Fixed with provider-specific endpoints",
+    "GUI Crashes": "Solved by switching to Streamlit"
+})
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def _safe_stat(path, follow_symlinks=True):
+    """Stat a path once, returning None if it does not exist"""
+    try:
+        return os.stat(path, follow_symlinks=follow_symlinks)
+    except FileNotFoundError:
+        return None
+
+def _read_json(path):
+    """Parse a JSON file, reading it to EOF
+    
+    The app swaps the config in with os.replace, so a size from an earlier stat may
+    belong to a different file than the one opened here.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    import json
+    return json.loads(data)
 
 def diagnose_issues():
     """Run diagnostic checks for common issues"""
-    print("=" * 70)
-    print("🔍 AI Token Manager - Diagnostic Report")
-    print("=" * 70)
+    out = io.StringIO()
+    try:
+        return _run_checks(out)
+    finally:
+        # Emit the whole report in one write instead of one print per line
+        sys.stdout.write(out.getvalue())
+        sys.stdout.flush()
+
+def _run_checks(out):
+    """Run each diagnostic check, writing the report into ``out``"""
+    def emit(line=""):
+        out.write(line)
+        out.write("\n")
+    
+    def status(prefix, msg):
+        out.write(prefix)
+        out.write(msg)
+        out.write("\n")
+    
+    ok = partial(status, OK)
+    bad = partial(status, BAD)
+    warn = partial(status, WARN)
+    info = partial(status, INFO)
+    
+    emit(SEP)
+    emit("🔍 AI Token Manager - Diagnostic Report")
+    emit(SEP)
     
     issues_found = []
     warnings = []
     
     # Check 1: Config file location
-    print("\n📂 Checking configuration files...")
+    emit("\n📂 Checking configuration files...")
     config_file = os.path.expanduser("~/.token_manager_config.json")
     key_file = os.path.expanduser("~/.token_manager_key")
     
-    if os.path.exists(config_file):
-        print(f"   ✓ Config file exists: {config_file}")
+    config_stat = _safe_stat(config_file)
+    # lstat is enough for a plain key file; only resolve the link when it is one
+    key_stat = _safe_stat(key_file, follow_symlinks=False)
+    if key_stat is not None and stat.S_ISLNK(key_stat.st_mode):
+        key_stat = _safe_stat(key_file)
+    
+    if config_stat is not None:
+        ok(f"Config file exists: {config_file}")
         try:
-            with open(config_file, 'r') as f:
-                config = json.load(f)
-            print(f"   ✓ Config is valid JSON")
+            config = _read_json(config_file)
+            ok("Config is valid JSON")
             
             # Check if providers is a list or dict
             providers = config.get('providers', [])
             if isinstance(providers, list):
                 provider_names = [p.get('name', 'Unknown') for p in providers]
-                print(f"   ℹ  Providers in config: {provider_names}")
+                info(f"Providers in config: {provider_names}")
             elif isinstance(providers, dict):
-                print(f"   ℹ  Providers in config: {list(providers.keys())}")
+                info(f"Providers in config: {list(providers.keys())}")
             else:
-                print(f"   ℹ  No providers in config")
+                info("No providers in config")
         except Exception as e:
             issues_found.append(f"Config file is corrupted: {e}")
-            print(f"   ✗ Config file is corrupted: {e}")
+            bad(f"Config file is corrupted: {e}")
     else:
         warnings.append("Config file doesn't exist yet (will be created on first run)")
-        print(f"   ⚠  Config file doesn't exist (will be created on first run)")
+        warn("Config file doesn't exist (will be created on first run)")
     
-    if os.path.exists(key_file):
-        print(f"   ✓ Encryption key exists: {key_file}")
+    if key_stat is not None:
+        ok(f"Encryption key exists: {key_file}")
         # Check permissions
-        import stat
-        mode = oct(os.stat(key_file).st_mode)[-3:]
-        if mode == '600':
-            print(f"   ✓ Key file permissions are secure (600)")
+        mode = stat.S_IMODE(key_stat.st_mode)
+        if mode == 0o600:
+            ok("Key file permissions are secure (600)")
         else:
-            warnings.append(f"Key file permissions are {mode}, should be 600")
-            print(f"   ⚠  Key file permissions are {mode}, should be 600")
+            warnings.append(f"Key file permissions are {mode:o}, should be 600")
+            warn(f"Key file permissions are {mode:o}, should be 600")
     else:
         warnings.append("Encryption key doesn't exist yet (will be created on first run)")
-        print(f"   ⚠  Encryption key doesn't exist (will be created on first run)")
+        warn("Encryption key doesn't exist (will be created on first run)")
     
     # Check 2: Environment variables
-    print("\n🔐 Checking environment variables...")
+    emit("\n🔐 Checking environment variables...")
     env_vars = ['OPENROUTER_API_KEY', 'HUGGINGFACE_API_KEY', 'TOGETHER_API_KEY']
-    found_keys = 0
+    env_snapshot = {var: os.environ.get(var) for var in env_vars}
+    found_keys = sum(1 for var in env_vars if env_snapshot[var])
     for var in env_vars:
-        if os.getenv(var):
-            print(f"   ✓ {var} is set")
-            found_keys += 1
+        if env_snapshot[var]:
+            ok(f"{var} is set")
         else:
-            print(f"   ℹ  {var} is not set")
+            info(f"{var} is not set")
     
     if found_keys == 0:
         warnings.append("No API keys found in environment variables")
-        print(f"   ℹ  No API keys in environment (you'll need to add them in the UI)")
+        info("No API keys in environment (you'll need to add them in the UI)")
     
     # Check 3: Import test
-    print("\n📦 Checking module imports...")
+    emit("\n📦 Checking module imports...")
     try:
         from enhanced_multi_provider_manager import (
             EnhancedTokenManager,
@@ -81,41 +154,42 @@ def diagnose_issues():
             HuggingFaceProvider,
             TogetherAIProvider,
             SecureStorage,
-            ProviderStatus
+            get_manager
         )
-        print(f"   ✓ All core modules import successfully")
+        ok("All core modules import successfully")
     except Exception as e:
         issues_found.append(f"Module import failed: {e}")
-        print(f"   ✗ Module import failed: {e}")
+        bad(f"Module import failed: {e}")
         return issues_found, warnings
     
     # Check 4: Provider initialization
-    print("\n🔌 Checking provider initialization...")
+    emit("\n🔌 Checking provider initialization...")
     try:
         providers = [
-            ("OpenRouter", OpenRouterProvider("")),
-            ("HuggingFace", HuggingFaceProvider("")),
-            ("Together AI", TogetherAIProvider(""))
+            ("OpenRouter", OpenRouterProvider),
+            ("HuggingFace", HuggingFaceProvider),
+            ("Together AI", TogetherAIProvider)
         ]
         
-        for name, provider in providers:
-            if provider.config.name:
-                print(f"   ✓ {name} initializes correctly")
-                print(f"     - Base URL: {provider.config.base_url}")
-                print(f"     - Models endpoint: {provider.config.models_endpoint}")
+        for name, provider_class in providers:
+            config = provider_class.DEFAULT_CONFIG
+            if config.name:
+                ok(f"{name} initializes correctly")
+                emit(f"     - Base URL: {config.base_url}")
+                emit(f"     - Models endpoint: {config.models_endpoint}")
             else:
                 issues_found.append(f"{name} provider has no name")
-                print(f"   ✗ {name} provider has no name")
+                bad(f"{name} provider has no name")
     except Exception as e:
         issues_found.append(f"Provider initialization failed: {e}")
-        print(f"   ✗ Provider initialization failed: {e}")
+        bad(f"Provider initialization failed: {e}")
     
     # Check 5: Manager initialization
-    print("\n🎯 Checking manager initialization...")
+    emit("\n🎯 Checking manager initialization...")
     try:
-        manager = EnhancedTokenManager()
-        print(f"   ✓ Manager initializes successfully")
-        print(f"   ℹ  Loaded {len(manager.providers)} providers from config/env")
+        manager = get_manager()
+        ok("Manager initializes successfully")
+        info(f"Loaded {len(manager.providers)} providers from config/env")
         
         # Check methods
         required_methods = [
@@ -123,92 +197,88 @@ def diagnose_issues():
             'rotate_provider', 'save_config', 'load_config'
         ]
         
+        available = set(dir(manager))
+        missing = [m for m in required_methods if m not in available]
         for method in required_methods:
-            if hasattr(manager, method):
-                print(f"   ✓ Method available: {method}()")
+            if method in available:
+                ok(f"Method available: {method}()")
             else:
-                issues_found.append(f"Missing method: {method}")
-                print(f"   ✗ Missing method: {method}")
+                bad(f"Missing method: {method}")
+        issues_found.extend(f"Missing method: {m}" for m in missing)
     except Exception as e:
         issues_found.append(f"Manager initialization failed: {e}")
-        print(f"   ✗ Manager initialization failed: {e}")
+        bad(f"Manager initialization failed: {e}")
     
     # Check 6: Encryption system
-    print("\n🔒 Checking encryption system...")
+    emit("\n🔒 Checking encryption system...")
     try:
         test_key = "sk-test-api-key-12345"
         encrypted = SecureStorage.encrypt_api_key(test_key)
         decrypted = SecureStorage.decrypt_api_key(encrypted)
         
         if decrypted == test_key:
-            print(f"   ✓ Encryption/decryption works correctly")
+            ok("Encryption/decryption works correctly")
         else:
             issues_found.append("Encryption round-trip failed")
-            print(f"   ✗ Encryption round-trip failed")
+            bad("Encryption round-trip failed")
     except Exception as e:
         issues_found.append(f"Encryption system error: {e}")
-        print(f"   ✗ Encryption system error: {e}")
+        bad(f"Encryption system error: {e}")
     
     # Check 7: Streamlit compatibility
-    print("\n🌊 Checking Streamlit setup...")
+    emit("\n🌊 Checking Streamlit setup...")
     try:
         import streamlit as st
-        print(f"   ✓ Streamlit is installed")
+        from pathlib import Path
+        ok("Streamlit is installed")
         
         # Check if we can run the app
         app_file = Path(__file__).parent / "enhanced_multi_provider_manager.py"
         if app_file.exists():
-            print(f"   ✓ Enhanced manager app found")
-            print(f"   ℹ  Run with: streamlit run {app_file}")
+            ok("Enhanced manager app found")
+            info(f"Run with: streamlit run {app_file}")
         else:
             warnings.append("Enhanced manager app not found")
-            print(f"   ⚠  Enhanced manager app not found")
+            warn("Enhanced manager app not found")
     except ImportError:
         issues_found.append("Streamlit is not installed")
-        print(f"   ✗ Streamlit is not installed")
+        bad("Streamlit is not installed")
     
     # Check 8: Known issues from USAGE_GUIDE
-    print("\n📋 Checking for known issues...")
-    known_issues = {
-        "API Keys Disappearing": "Fixed in enhanced version with encrypted storage",
-        "HuggingFace 400 Errors": "Fixed with improved API handling",
-        "Model Loading Issues": "Fixed with provider-specific endpoints",
-        "GUI Crashes": "Solved by switching to Streamlit"
-    }
-    
-    for issue, fix in known_issues.items():
-        print(f"   ✓ {issue}: {fix}")
+    emit("\n📋 Checking for known issues...")
+    for issue, fix in _KNOWN_ISSUES.items():
+        ok(f"{issue}: {fix}")
     
     # Summary
-    print("\n" + "=" * 70)
-    print("📊 Diagnostic Summary")
-    print("=" * 70)
+    emit(RULE)
+    emit("📊 Diagnostic Summary")
+    emit(SEP)
     
     if not issues_found and not warnings:
-        print("✅ No issues found - System is healthy!")
+        emit("✅ No issues found - System is healthy!")
     else:
         if issues_found:
-            print(f"\n❌ Issues Found ({len(issues_found)}):")
+            emit(f"\n❌ Issues Found ({len(issues_found)}):")
             for i, issue in enumerate(issues_found, 1):
-                print(f"   {i}. {issue}")
+                emit(f"   {i}. {issue}")
         
         if warnings:
-            print(f"\n⚠️  Warnings ({len(warnings)}):")
+            emit(f"\n⚠️  Warnings ({len(warnings)}):")
             for i, warning in enumerate(warnings, 1):
-                print(f"   {i}. {warning}")
+                emit(f"   {i}. {warning}")
     
-    print("\n" + "=" * 70)
-    print("💡 Recommendations:")
-    print("=" * 70)
+    emit(RULE)
+    emit("💡 Recommendations:")
+    emit(SEP)
     
-    if not os.getenv('OPENROUTER_API_KEY') and not os.getenv('HUGGINGFACE_API_KEY'):
-        print("1. Set API keys in environment variables or add them via the UI")
+    if not env_snapshot['OPENROUTER_API_KEY'] and not env_snapshot['HUGGINGFACE_API_KEY']:
+        emit("1. Set API keys in environment variables or add them via the UI")
     
-    print("2. Run the app with: streamlit run enhanced_multi_provider_manager.py")
-    print("3. For testing without API keys, the smoke tests pass successfully")
-    print("4. All core functionality is working correctly")
+    emit("2. Run the app with: streamlit run enhanced_multi_provider_manager.py")
+    emit("3. For testing without API keys, the smoke tests pass successfully")
+    emit("4. All core functionality is working correctly")
     
-    print("=" * 70)
+    emit(SEP)
     
     return issues_found, warnings
 
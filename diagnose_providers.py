@@ -1,14 +1,24 @@
 #!/usr/bin/env python3
-"""Diagnose provider and model loading issues"""
+"""Diagnose provider and model loading issues
+
+Model lists are served from the on-disk cache when fresh; pass --refresh to
+force a network fetch.
+"""
 
 import sys
-from enhanced_multi_provider_manager import EnhancedTokenManager
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from enhanced_multi_provider_manager import get_manager
+
+SEP = "=" * 70
+RULE = "\n" + SEP
+REFRESH = "--refresh" in sys.argv[1:]
 
-print("=" * 70)
+print(SEP)
 print("🔍 Provider & Model Loading Diagnostics")
-print("=" * 70)
+print(SEP)
 
-manager = EnhancedTokenManager()
+manager = get_manager()
 
 print(f"\n📊 Providers: {len(manager.providers)}")
 print(f"Current provider index: {manager.current_provider_index}")
@@ -18,9 +28,17 @@ if not manager.providers:
     print("Add providers via the UI or environment variables")
     sys.exit(1)
 
-print("\n" + "=" * 70)
+print(RULE)
 print("🔌 Provider Status")
-print("=" * 70)
+print(SEP)
+
+# Fetch model lists from all keyed providers concurrently
+executor = ThreadPoolExecutor(max_workers=len(manager.providers))
+model_futures = {
+    i: executor.submit(provider.get_models_cached, refresh=REFRESH)
+    for i, provider in enumerate(manager.providers)
+    if provider.api_key
+}
 
 for i, provider in enumerate(manager.providers):
     is_current = " ⭐ CURRENT" if i == manager.current_provider_index else ""
@@ -33,39 +51,42 @@ for i, provider in enumerate(manager.providers):
     if provider.api_key:
         # Try to get models
         print(f"   Testing model fetch...")
-        models, error = provider.get_models()
+        models, error = model_futures[i].result()
         
         if error:
             print(f"   ❌ Error: {error}")
         elif models:
-            print(f"   ✓ Successfully loaded {len(models)} models")
-            if len(models) > 0:
-                # Show first few models
-                for j, model in enumerate(models[:3]):
-                    model_id = model.get('id', model.get('name', 'unknown'))
-                    print(f"      - {model_id}")
-                if len(models) > 3:
-                    print(f"      ... and {len(models) - 3} more")
+            n = len(models)
+            print(f"   ✓ Successfully loaded {n} models")
+            # Show first few models
+            for model in islice(models, 3):
+                model_id = model.get('id', model.get('name', 'unknown'))
+                print(f"      - {model_id}")
+            if n > 3:
+                print(f"      ... and {n - 3} more")
         else:
             print(f"   ⚠️  No models returned (empty list)")
     else:
         print(f"   ⚠️  No API key - cannot fetch models")
 
-print("\n" + "=" * 70)
+executor.shutdown()
+
+print(RULE)
 print("🔄 Testing get_all_models()")
-print("=" * 70)
+print(SEP)
 
 all_models = manager.get_all_models()
 
 if all_models:
     print(f"\n✓ Successfully got models from {len(all_models)} provider(s)")
     for provider_name, models in all_models.items():
-        print(f"\n  {provider_name}: {len(models)} models")
-        for model in models[:3]:
+        n = len(models)
+        print(f"\n  {provider_name}: {n} models")
+        for model in islice(models, 3):
             model_id = model.get('id', model.get('name', 'unknown'))
             print(f"    - {model_id}")
-        if len(models) > 3:
-            print(f"    ... and {len(models) - 3} more")
+        if n > 3:
+            print(f"    ... and {n - 3} more")
 else:
     print("\n❌ No models loaded from any provider")
     print("\nPossible reasons:")
@@ -74,9 +95,9 @@ else:
     print("  3. Provider API is down")
     print("  4. Rate limits exceeded")
 
-print("\n" + "=" * 70)
+print(RULE)
 print("💡 Recommendations")
-print("=" * 70)
+print(SEP)
 
 current = manager.get_current_provider()
 if current:
@@ -90,4 +111,4 @@ else:
     print("\n❌ No current provider set")
     print("   → Add a provider via the UI")
 
-print("\n" + "=" * 70)
+print(RULE)
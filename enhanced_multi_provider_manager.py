@@ -7,25 +7,101 @@ streamlit GUI for better stability, and enhanced error handling.
 
 import os
 import sys
+import atexit
 import json
 import time
+import random
+import tempfile
 import threading
+import weakref
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.retry import Retry
 import streamlit as st
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Any, ClassVar
 import logging
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields, replace
+from collections import Counter
+from http.cookiejar import DefaultCookiePolicy
+from functools import lru_cache
+from itertools import islice
 from enum import Enum
 import base64
 from cryptography.fernet import Fernet
 import hashlib
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Optional faster JSON parser
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Optional streaming JSON parser for large model listings
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Length of the provider rate-limit window in seconds
+RATE_LIMIT_WINDOW = 3600.0
+
+# Maximum number of Hugging Face models to list
+HF_MODEL_LIMIT = 50
+
+# Seconds to coalesce config mutations before writing them to disk
+CONFIG_SAVE_DEBOUNCE = 2.0
+
+# Attempts and backoff bounds (seconds) for transient HTTP failures
+REQUEST_MAX_ATTEMPTS = 3
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+BACKOFF_JITTER = 0.5
+
+# Seconds a provider sits out after persistent 429s when no Retry-After is given
+RATE_LIMIT_COOLDOWN = 60.0
+
+# Overall seconds get_all_models waits for the provider fan-out
+MODEL_FETCH_TIMEOUT = 15.0
+
+# Seconds between checks on a model refresh started from the chat tab
+MODEL_REFRESH_POLL_INTERVAL = 0.5
+
+# Rows per page in the Status tab provider table
+STATUS_PAGE_SIZE = 50
+
+# Columns shown in the Status tab provider table, in display order
+STATUS_DISPLAY_COLUMNS = (
+    'name', 'status', 'has_key', 'requests', 'rate_limit',
+    'tokens', 'token_limit', 'usage_percent', 'request_percent'
+)
+
+# Chat messages rendered per rerun; "Show earlier" widens the window by this much
+CHAT_HISTORY_WINDOW = 20
+
+# On-disk cache for provider model lists
+MODELS_CACHE_DIR = os.path.expanduser("~/.token_manager_cache")
+
+def _json_loads(data):
+    """Parse JSON bytes or text, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _json_dumps(obj, default=None) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=default)
+    return json.dumps(obj, separators=(',', ':'), default=default).encode()
+
 # Try to import RAG assistant
 try:
     from rag_assistant import SimpleRAG, EnhancedRAGAssistant
@@ -40,6 +116,20 @@ class ProviderStatus(Enum):
     ERROR = "error"
     DISABLED = "disabled"
 
+# String value per status, looked up instead of Enum.value on hot render paths
+_STATUS_VALUES: Dict[ProviderStatus, str] = {status: status.value for status in ProviderStatus}
+
+# Reverse lookup used when parsing saved configs
+_STATUS_BY_VALUE: Dict[str, ProviderStatus] = {value: status for status, value in _STATUS_VALUES.items()}
+
+# Sidebar indicator per provider status value
+STATUS_INDICATORS = {
+    'active': '🟢',
+    'exhausted': '🟡',
+    'error': '🔴',
+    'disabled': '⚪'
+}
+
 @dataclass
 class TokenUsage:
     prompt_tokens: int = 0
@@ -59,17 +149,80 @@ class ProviderConfig:
     rate_limit: int = 1000
     token_limit: int = 100000
     status: ProviderStatus = ProviderStatus.ACTIVE
-    usage: TokenUsage = None
+    usage: Optional[TokenUsage] = None
+    # Wall-clock (time.time()) end of a rate-limit cooldown; saved so it survives restarts
+    cooldown_until: Optional[float] = None
     
     def __post_init__(self):
         if self.usage is None:
             self.usage = TokenUsage(last_reset=datetime.now())
 
+# Field names accepted when restoring saved configs; anything else is dropped
+_USAGE_FIELDS = frozenset(f.name for f in fields(TokenUsage))
+_CONFIG_FIELDS = frozenset(f.name for f in fields(ProviderConfig))
+
+def _config_to_dict(config: ProviderConfig) -> Dict[str, Any]:
+    """Serialize a provider config straight to its JSON-ready form"""
+    status = config.status
+    if isinstance(status, ProviderStatus):
+        status = _STATUS_VALUES[status]
+    elif isinstance(status, str) and '.' in status:
+        # Handle already stringified enum like "ProviderStatus.ACTIVE"
+        status = status.split('.')[-1].lower()
+    
+    usage = config.usage
+    usage_data = None
+    if usage is not None:
+        usage_data = {
+            'prompt_tokens': usage.prompt_tokens,
+            'completion_tokens': usage.completion_tokens,
+            'total_tokens': usage.total_tokens,
+            'requests': usage.requests,
+            'last_reset': usage.last_reset.isoformat() if usage.last_reset else None
+        }
+    
+    return {
+        'name': config.name,
+        'api_key_encrypted': config.api_key_encrypted,
+        'base_url': config.base_url,
+        'models_endpoint': config.models_endpoint,
+        'chat_endpoint': config.chat_endpoint,
+        'headers': dict(config.headers),
+        'rate_limit': config.rate_limit,
+        'token_limit': config.token_limit,
+        'status': status,
+        'usage': usage_data,
+        'cooldown_until': config.cooldown_until
+    }
+
 class SecureStorage:
     """Secure storage for API keys using encryption"""
     
+    # Key material is loaded once per process and shared by all providers
+    _cached_key: ClassVar[Optional[bytes]] = None
+    _cached_fernet: ClassVar[Optional[Fernet]] = None
+    _key_lock: ClassVar[threading.Lock] = threading.Lock()
+    
+    @classmethod
+    def _get_key(cls) -> bytes:
+        """Get the encryption key, reading or creating the key file only once"""
+        if cls._cached_key is None:
+            with cls._key_lock:
+                if cls._cached_key is None:
+                    key = cls._load_or_create_key()
+                    cls._cached_fernet = Fernet(key)
+                    cls._cached_key = key
+        return cls._cached_key
+    
+    @classmethod
+    def _get_fernet(cls) -> Fernet:
+        """Get the shared Fernet cipher for the cached key"""
+        if cls._cached_fernet is None:
+            cls._get_key()
+        return cls._cached_fernet
+    
     @staticmethod
-    def _get_key() -> bytes:
+    def _load_or_create_key() -> bytes:
         """Generate or retrieve encryption key"""
         key_file = os.path.expanduser("~/.token_manager_key")
         if os.path.exists(key_file):
@@ -88,8 +241,7 @@ class SecureStorage:
         """Encrypt API key for storage"""
         if not api_key:
             return ""
-        key = SecureStorage._get_key()
-        fernet = Fernet(key)
+        fernet = SecureStorage._get_fernet()
         encrypted = fernet.encrypt(api_key.encode())
         return base64.urlsafe_b64encode(encrypted).decode()
     
@@ -99,8 +251,7 @@ class SecureStorage:
         if not encrypted_key:
             return ""
         try:
-            key = SecureStorage._get_key()
-            fernet = Fernet(key)
+            fernet = SecureStorage._get_fernet()
             encrypted_bytes = base64.urlsafe_b64decode(encrypted_key.encode())
             decrypted = fernet.decrypt(encrypted_bytes)
             return decrypted.decode()
@@ -108,117 +259,346 @@ class SecureStorage:
             logger.error(f"Failed to decrypt API key: {e}")
             return ""
 
+@lru_cache(maxsize=1)
+def _get_session() -> requests.Session:
+    """Get the process-wide keep-alive HTTP session shared by all providers
+    
+    The pool holds one entry per provider host and enough connections per host for
+    the get_all_models fan-out, so warm calls skip the TCP and TLS handshakes.
+    """
+    session = requests.Session()
+    # Every browser session's keys go through this one session; a cookie set in reply
+    # to one user's request must never ride along on another's, so none are kept
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=Retry(total=0))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers['User-Agent'] = "ai-token-manager"
+    return session
+
+@lru_cache(maxsize=1)
+def _get_background_executor() -> ThreadPoolExecutor:
+    """Get the process-wide pool for background work (auto-refresh, manual model refresh)
+    
+    Shared by every session's manager, so worker threads don't pile up per session.
+    """
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="tm-bg")
+
+def _backoff_delay(attempt: int, retry_after: Optional[str] = None, full_jitter: bool = False) -> float:
+    """Seconds to wait before retrying after failed attempt number `attempt` (0-based)
+    
+    full_jitter draws uniformly from [0, cap] (and adds up to 1s on top of Retry-After),
+    which spreads out clients that all failed at the same moment.
+    """
+    if retry_after:
+        try:
+            delay = min(BACKOFF_MAX, max(0.0, float(retry_after)))
+            return delay + random.uniform(0.0, 1.0) if full_jitter else delay
+        except ValueError:
+            pass  # HTTP-date form; fall back to the computed backoff
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+    if full_jitter:
+        return random.uniform(0.0, delay)
+    return delay * (1 + random.uniform(-BACKOFF_JITTER, BACKOFF_JITTER))
+
+def _short_body(response: requests.Response, limit: int = 512) -> str:
+    """Get the start of a response body for error messages without reading all of it"""
+    head = next(response.iter_content(chunk_size=limit), b'')
+    return head[:limit].decode('utf-8', errors='replace')
+
+def _failed_before_send(exc: requests.exceptions.ConnectionError) -> bool:
+    """True if the request never reached the server (DNS failure, refused or timed-out connect)
+    
+    Only these are safe to retry for a POST; anything later may already have been processed.
+    """
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+    # urllib3's NewConnectionError and NameResolutionError subclass ConnectTimeoutError
+    return isinstance(reason, ConnectTimeoutError)
+
+@lru_cache(maxsize=32)
+def _decrypt_cached(encrypted_key: str) -> str:
+    """Decrypt each distinct ciphertext once per process"""
+    return SecureStorage.decrypt_api_key(encrypted_key)
+
 class APIProvider:
     """Base class for AI API providers"""
     
+    # Class-level defaults so callers can inspect a provider without building one
+    DEFAULT_CONFIG: ClassVar[Optional[ProviderConfig]] = None
+    
+    # Seconds a fetched model list is served without asking the provider again
+    MODELS_TTL: ClassVar[float] = 300.0
+    
     def __init__(self, config: ProviderConfig):
         self.config = config
-        self._decrypted_key = None
+        self._session = _get_session()
+        self._usage_lock = threading.Lock()
+        self._window_start = 0.0
+        self._window_usage: Optional[TokenUsage] = None
+        self._auth_headers: Optional[Dict[str, str]] = None
+        self._auth_headers_source: Optional[Tuple[str, Dict[str, str]]] = None
+        self._known_key: Optional[Tuple[str, str]] = None  # (ciphertext, plaintext) from set_api_key
+        self._models_etag: Optional[Tuple[str, List[Dict]]] = None  # (ETag, models) for revalidation
+        self._models_memo: Optional[Tuple[str, float, List[Dict]]] = None  # (key ciphertext, monotonic fetch time, models)
+    
+    @classmethod
+    def default_config(cls) -> ProviderConfig:
+        """Get a fresh, mutable copy of the provider's default configuration"""
+        defaults = cls.DEFAULT_CONFIG
+        return replace(defaults, headers=dict(defaults.headers), usage=None)
     
     @property
     def api_key(self) -> str:
         """Get decrypted API key"""
-        if self._decrypted_key is None:
-            self._decrypted_key = SecureStorage.decrypt_api_key(self.config.api_key_encrypted)
-        return self._decrypted_key
+        encrypted = self.config.api_key_encrypted
+        known = self._known_key
+        if known is not None and known[0] == encrypted:
+            return known[1]
+        return _decrypt_cached(encrypted)
+    
+    @property
+    def has_key(self) -> bool:
+        """Check whether an API key is stored, without decrypting it"""
+        return bool(self.config.api_key_encrypted)
     
     def set_api_key(self, api_key: str):
         """Set and encrypt API key"""
         self.config.api_key_encrypted = SecureStorage.encrypt_api_key(api_key)
-        self._decrypted_key = api_key
+        # Keys set in this process never need a decrypt round trip
+        self._known_key = (self.config.api_key_encrypted, api_key)
     
-    def is_available(self) -> bool:
-        """Check if provider is available for requests"""
-        if self.config.status != ProviderStatus.ACTIVE:
-            return False
+    @property
+    def auth_headers(self) -> Dict[str, str]:
+        """Get request headers with Authorization, rebuilt only when key or headers change"""
+        source = self._auth_headers_source
+        encrypted = self.config.api_key_encrypted
+        if source is None or source[0] != encrypted or source[1] is not self.config.headers:
+            self._auth_headers = {
+                'Content-Type': 'application/json',  # Bodies are sent pre-serialized
+                **self.config.headers,
+                'Authorization': f"Bearer {self.api_key}"
+            }
+            self._auth_headers_source = (encrypted, self.config.headers)
+        return self._auth_headers
+    
+    def _record_usage(self, request_count: int = 0, prompt_tokens: int = 0,
+                      completion_tokens: int = 0, total_tokens: int = 0):
+        """Add to the usage counters atomically"""
+        with self._usage_lock:
+            usage = self.config.usage
+            usage.requests += request_count
+            usage.prompt_tokens += prompt_tokens
+            usage.completion_tokens += completion_tokens
+            usage.total_tokens += total_tokens
+    
+    def is_available(self, now: Optional[float] = None) -> bool:
+        """Check if provider is available for requests
         
-        now = datetime.now()
-        hour_ago = now - timedelta(hours=1)
+        now is a time.monotonic() reading, letting a caller scanning several providers
+        share one clock read.
+        """
+        # Cheapest checks first: an identity compare, then float arithmetic
+        config = self.config
+        if config.status is not ProviderStatus.ACTIVE:
+            # Only a rate-limit cooldown expires; a 402 exhaustion has no deadline
+            if config.status is not ProviderStatus.EXHAUSTED or config.cooldown_until is None:
+                return False
+            # Wall clock, not `now`: the deadline may have been saved by an earlier process
+            if time.time() < config.cooldown_until:
+                return False
+            # Rate-limit cooldown is over; put the provider back into rotation
+            config.status = ProviderStatus.ACTIVE
+            config.cooldown_until = None
         
-        # Reset counters if hour has passed
-        if self.config.usage.last_reset and self.config.usage.last_reset < hour_ago:
-            self.config.usage = TokenUsage(last_reset=now)
+        if now is None:
+            now = time.monotonic()
+        usage = config.usage
+        if usage is not self._window_usage:
+            # New or reloaded usage - anchor the monotonic window to its last_reset
+            age = (datetime.now() - usage.last_reset).total_seconds() if usage.last_reset else 0.0
+            self._window_start = now - age
+            self._window_usage = usage
         
-        # Check rate limits
-        if self.config.usage.requests >= self.config.rate_limit:
-            return False
+        # Reset counters if the rate-limit window has passed
+        if now - self._window_start >= RATE_LIMIT_WINDOW:
+            config.usage = usage = TokenUsage(last_reset=datetime.now())
+            self._window_start = now
+            self._window_usage = usage
         
-        if self.config.usage.total_tokens >= self.config.token_limit:
-            return False
-        
-        return True
+        # Check rate limits
+        return usage.requests < config.rate_limit and usage.total_tokens < config.token_limit
+    
+    def _models_request_headers(self) -> Dict[str, str]:
+        """Headers for a models fetch, revalidating the last list via If-None-Match"""
+        if self._models_etag is None:
+            return self.auth_headers
+        return {**self.auth_headers, 'If-None-Match': self._models_etag[0]}
+    
+    def _remember_models_etag(self, response: requests.Response, models: List[Dict]):
+        """Keep the response's ETag so the next fetch can be answered with a 304"""
+        etag = response.headers.get('ETag')
+        self._models_etag = (etag, models) if etag else None
     
     def make_request(self, endpoint: str, data: Dict, timeout: int = 60) -> Tuple[Dict, Optional[str]]:
-        """Make API request with error handling"""
-        try:
-            headers = self.config.headers.copy()
-            headers['Authorization'] = f"Bearer {self.api_key}"
-            
-            response = requests.post(
-                f"{self.config.base_url}/{endpoint}",
-                headers=headers,
-                json=data,
-                timeout=timeout
-            )
-            
-            self.config.usage.requests += 1
-            
-            if response.status_code == 401:
-                self.config.status = ProviderStatus.ERROR
-                return {}, "Invalid API key"
-            elif response.status_code in [402, 429]:
-                self.config.status = ProviderStatus.EXHAUSTED
-                return {}, f"Quota exhausted (HTTP {response.status_code})"
-            elif response.status_code >= 400:
-                return {}, f"HTTP {response.status_code}: {response.text}"
-            
-            result = response.json()
-            
-            # Update token usage if available
-            if 'usage' in result:
-                usage = result['usage']
-                self.config.usage.prompt_tokens += usage.get('prompt_tokens', 0)
-                self.config.usage.completion_tokens += usage.get('completion_tokens', 0)
-                self.config.usage.total_tokens += usage.get('total_tokens', 0)
-            
-            return result, None
+        """Make API request with error handling, retrying 429s and failed connects with backoff
+        
+        A read timeout or a connection dropped mid-request is not retried: the body was
+        already sent, so a retry could generate (and bill) the completion twice.
+        """
+        url = f"{self.config.base_url}/{endpoint}"
+        body = _json_dumps(data)
+        error = None
+        rate_limited = False
+        
+        for attempt in range(REQUEST_MAX_ATTEMPTS):
+            retry_after = None
+            try:
+                with self._session.post(
+                    url,
+                    headers=self.auth_headers,
+                    data=body,
+                    timeout=timeout,
+                    stream=True
+                ) as response:
+                    self._record_usage(request_count=1)
+                    
+                    if response.status_code == 401:
+                        self.config.status = ProviderStatus.ERROR
+                        return {}, "Invalid API key"
+                    elif response.status_code == 402:
+                        # Out of credit: no cooldown, so it stays out until the user steps in
+                        self.config.status = ProviderStatus.EXHAUSTED
+                        self.config.cooldown_until = None
+                        return {}, f"Quota exhausted (HTTP {response.status_code})"
+                    elif response.status_code == 429:
+                        # Often transient; only give up on the provider once retries run out
+                        error = f"Quota exhausted (HTTP {response.status_code})"
+                        rate_limited = True
+                        retry_after = response.headers.get('Retry-After')
+                    elif response.status_code >= 400:
+                        return {}, f"HTTP {response.status_code}: {_short_body(response)}"
+                    else:
+                        result = _json_loads(response.content)
+                        
+                        # Update token usage if available
+                        if 'usage' in result:
+                            usage = result['usage']
+                            self._record_usage(
+                                prompt_tokens=usage.get('prompt_tokens', 0),
+                                completion_tokens=usage.get('completion_tokens', 0),
+                                total_tokens=usage.get('total_tokens', 0)
+                            )
+                        
+                        return result, None
+                    
+            except requests.exceptions.ConnectionError as e:
+                # Checked before Timeout: ConnectTimeout is both, and is safe to retry
+                if not _failed_before_send(e):
+                    return {}, "Connection error"
+                error, rate_limited = "Connection error", False
+            except requests.exceptions.Timeout:
+                return {}, "Request timeout"
+            except Exception as e:
+                return {}, str(e)
             
-        except requests.exceptions.Timeout:
-            return {}, "Request timeout"
-        except requests.exceptions.ConnectionError:
-            return {}, "Connection error"
-        except Exception as e:
-            return {}, str(e)
+            if attempt < REQUEST_MAX_ATTEMPTS - 1:
+                wait_time = _backoff_delay(attempt, retry_after)
+                logger.warning(f"{self.config.name}: {error}, retrying in {wait_time:.1f}s")
+                time.sleep(wait_time)
+        
+        if rate_limited:
+            # Sit out until Retry-After (or a default cooldown) rather than being retried on every call
+            self.config.status = ProviderStatus.EXHAUSTED
+            cooldown = RATE_LIMIT_COOLDOWN
+            if retry_after:
+                try:
+                    cooldown = max(0.0, float(retry_after))
+                except ValueError:
+                    pass  # HTTP-date form; keep the default cooldown
+            self.config.cooldown_until = time.time() + cooldown
+        return {}, error
     
     def get_models(self) -> Tuple[List[Dict], Optional[str]]:
         """Get available models from provider"""
         try:
-            headers = {'Authorization': f"Bearer {self.api_key}"}
-            headers.update(self.config.headers)
-            
-            response = requests.get(
+            with self._session.get(
                 f"{self.config.base_url}/{self.config.models_endpoint}",
-                headers=headers,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"Provider {self.config.name} failed to fetch models: HTTP {response.status_code}")
-                return [], f"Failed to fetch models: HTTP {response.status_code} - {response.text}"
-            
-            data = response.json()
-            models = data.get('models', data.get('data', []))
-            
-            if not isinstance(models, list):
-                logger.error(f"Provider {self.config.name} returned unexpected model format: {type(models)}")
-                return [], "Unexpected model list format"
-            
-            return models, None
-            
+                headers=self._models_request_headers(),
+                timeout=30,
+                stream=True
+            ) as response:
+                if response.status_code == 304 and self._models_etag is not None:
+                    return self._models_etag[1], None
+                
+                if response.status_code != 200:
+                    logger.error(f"Provider {self.config.name} failed to fetch models: HTTP {response.status_code}")
+                    return [], f"Failed to fetch models: HTTP {response.status_code} - {_short_body(response)}"
+                
+                data = _json_loads(response.content)
+                models = data.get('models', data.get('data', []))
+                
+                if not isinstance(models, list):
+                    logger.error(f"Provider {self.config.name} returned unexpected model format: {type(models)}")
+                    return [], "Unexpected model list format"
+                
+                self._remember_models_etag(response, models)
+                return models, None
+                
         except Exception as e:
             logger.error(f"Error fetching models from {self.config.name}: {e}")
             return [], str(e)
     
+    def get_models_cached(self, ttl: Optional[float] = None, refresh: bool = False) -> Tuple[List[Dict], Optional[str]]:
+        """Get models, serving them from memory or an on-disk cache younger than ttl seconds
+        
+        ttl defaults to the provider's MODELS_TTL. A refresh still revalidates with the
+        provider's ETag, so an unchanged list costs a 304 rather than a full download.
+        Both cache layers are per API key, so a list fetched with one key never hides
+        a bad or just-changed key.
+        """
+        if ttl is None:
+            ttl = self.MODELS_TTL
+        encrypted = self.config.api_key_encrypted
+        slug = ''.join(c if c.isalnum() else '_' for c in self.config.name.lower())
+        # The cache directory is shared by every session, so the file name carries a key fingerprint
+        fingerprint = hashlib.sha256(self.api_key.encode()).hexdigest()[:16]
+        cache_file = os.path.join(MODELS_CACHE_DIR, f"models_{slug}_{fingerprint}.json")
+        
+        if not refresh:
+            memo = self._models_memo
+            if memo is not None and memo[0] == encrypted and time.monotonic() - memo[1] < ttl:
+                return memo[2], None
+            try:
+                if time.time() - os.stat(cache_file).st_mtime < ttl:
+                    with open(cache_file, 'rb') as f:
+                        return _json_loads(f.read()), None
+            except (OSError, ValueError):
+                pass  # Missing or unreadable cache - fall through to a fresh fetch
+        
+        models, error = self.get_models()
+        if not error:
+            self._models_memo = (encrypted, time.monotonic(), models)
+            tmp_file = None
+            try:
+                os.makedirs(MODELS_CACHE_DIR, exist_ok=True)
+                # Unique temp name: several sessions' fan-outs may write this cache at once
+                fd, tmp_file = tempfile.mkstemp(dir=MODELS_CACHE_DIR, prefix=f"models_{slug}_{fingerprint}.", suffix=".tmp")
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(_json_dumps(models))
+                os.replace(tmp_file, cache_file)
+                tmp_file = None
+            except OSError as e:
+                logger.warning(f"Failed to cache models for {self.config.name}: {e}")
+            finally:
+                if tmp_file is not None:
+                    try:
+                        os.remove(tmp_file)
+                    except OSError:
+                        pass
+        return models, error
+    
     def send_chat(self, model_id: str, messages: List[Dict]) -> Tuple[Dict, Optional[str]]:
         """Send chat completion request"""
         data = {
@@ -230,68 +610,83 @@ class APIProvider:
 class OpenRouterProvider(APIProvider):
     """OpenRouter API provider"""
     
+    DEFAULT_CONFIG = ProviderConfig(
+        name="OpenRouter",
+        api_key_encrypted="",
+        base_url="https://openrouter.ai/api/v1",
+        models_endpoint="models",
+        chat_endpoint="chat/completions",
+        headers={
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://localhost:3000",
+            "X-Title": "Multi-Provider Token Manager"
+        }
+    )
+    
     def __init__(self, api_key: str = ""):
-        config = ProviderConfig(
-            name="OpenRouter",
-            api_key_encrypted="",
-            base_url="https://openrouter.ai/api/v1",
-            models_endpoint="models",
-            chat_endpoint="chat/completions",
-            headers={
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://localhost:3000",
-                "X-Title": "Multi-Provider Token Manager"
-            }
-        )
-        super().__init__(config)
+        super().__init__(self.default_config())
         if api_key:
             self.set_api_key(api_key)
 
 class HuggingFaceProvider(APIProvider):
     """Hugging Face API provider with improved model handling"""
     
+    DEFAULT_CONFIG = ProviderConfig(
+        name="Hugging Face",
+        api_key_encrypted="",
+        base_url="https://api-inference.huggingface.co",
+        models_endpoint=f"models?pipeline_tag=text-generation&sort=downloads&direction=-1&limit={HF_MODEL_LIMIT}",
+        chat_endpoint="models",
+        headers={
+            "Content-Type": "application/json"
+        },
+        rate_limit=100,
+        token_limit=50000
+    )
+    
+    # The downloads-sorted listing barely moves between fetches
+    MODELS_TTL = 900.0
+    
     def __init__(self, api_key: str = ""):
-        config = ProviderConfig(
-            name="Hugging Face",
-            api_key_encrypted="",
-            base_url="https://api-inference.huggingface.co",
-            models_endpoint="models?pipeline_tag=text-generation&sort=downloads&direction=-1&limit=50",
-            chat_endpoint="models",
-            headers={
-                "Content-Type": "application/json"
-            },
-            rate_limit=100,
-            token_limit=50000
-        )
-        super().__init__(config)
+        super().__init__(self.default_config())
         if api_key:
             self.set_api_key(api_key)
     
     def get_models(self) -> Tuple[List[Dict], Optional[str]]:
         """Get available text generation models from HuggingFace"""
         try:
-            headers = {'Authorization': f"Bearer {self.api_key}"}
-            
-            response = requests.get(
+            with self._session.get(
                 f"{self.config.base_url}/{self.config.models_endpoint}",
-                headers=headers,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                return [], f"Failed to fetch models: HTTP {response.status_code} - {response.text}"
-            
-            models_data = response.json()
-            
-            # Transform HF model format to standard format
-            models = []
-            for model in models_data:
-                if isinstance(model, dict):
-                    models.append({
-                        'id': model.get('id', model.get('modelId', 'unknown')),
-                        'name': model.get('id', model.get('modelId', 'unknown')),
-                        'description': f"Downloads: {model.get('downloads', 0)}, Likes: {model.get('likes', 0)}"
-                    })
+                headers=self._models_request_headers(),
+                timeout=30,
+                stream=True
+            ) as response:
+                if response.status_code == 304 and self._models_etag is not None:
+                    return self._models_etag[1], None
+                
+                if response.status_code != 200:
+                    return [], f"Failed to fetch models: HTTP {response.status_code} - {_short_body(response)}"
+                
+                if IJSON_AVAILABLE:
+                    # Parse entries as they arrive and stop reading once we have enough
+                    response.raw.decode_content = True
+                    models_data = islice(ijson.items(response.raw, 'item'), HF_MODEL_LIMIT)
+                else:
+                    models_data = _json_loads(response.content)
+                
+                # Transform HF model format to standard format
+                models = []
+                for model in models_data:
+                    if isinstance(model, dict):
+                        # Look the id up once; `or` skips the modelId lookup when id is present
+                        model_id = model.get('id') or model.get('modelId') or 'unknown'
+                        models.append({
+                            'id': model_id,
+                            'name': model_id,
+                            'description': f"Downloads: {model.get('downloads', 0)}, Likes: {model.get('likes', 0)}"
+                        })
+                
+                self._remember_models_etag(response, models)
             
             return models, None
             
@@ -302,69 +697,65 @@ class HuggingFaceProvider(APIProvider):
     def send_chat(self, model_id: str, messages: List[Dict]) -> Tuple[Dict, Optional[str]]:
         """Send request to Hugging Face model with improved error handling"""
         # Convert messages to prompt for HF
-        prompt = ""
-        for msg in messages:
-            role = msg.get('role', 'user')
-            content = msg.get('content', '')
-            prompt += f"{role}: {content}\n"
+        prompt = "".join(f"{msg.get('role', 'user')}: {msg.get('content', '')}\n" for msg in messages)
+        prompt_tokens = len(prompt.split())
         
-        data = {"inputs": prompt, "parameters": {"max_new_tokens": 100, "return_full_text": False}}
+        body = _json_dumps({"inputs": prompt, "parameters": {"max_new_tokens": 100, "return_full_text": False}})
         endpoint = f"models/{model_id}"
         
         MAX_RETRIES = 3
         for attempt in range(MAX_RETRIES):
             try:
-                headers = self.config.headers.copy()
-                headers['Authorization'] = f"Bearer {self.api_key}"
-                
-                response = requests.post(
+                with self._session.post(
                     f"{self.config.base_url}/{endpoint}",
-                    headers=headers,
-                    json=data,
-                    timeout=60
-                )
-                
-                if response.status_code == 503:
-                    if attempt < MAX_RETRIES - 1:
-                        wait_time = 2 ** attempt
-                        logger.warning(f"HF model {model_id} is loading (503). Retrying in {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        return {}, "Model consistently unavailable after retries (503)"
-                
-                if response.status_code != 200:
-                    return {}, f"HTTP {response.status_code}: {response.text}"
-                
-                result = response.json()
-                self.config.usage.requests += 1
-                
-                # Convert HF response to standard format
-                if isinstance(result, list) and len(result) > 0:
-                    generated_text = result[0].get('generated_text', '')
-                    standardized = {
-                        'choices': [{
-                            'message': {
-                                'content': generated_text,
-                                'role': 'assistant'
-                            }
-                        }],
-                        'usage': {
-                            'prompt_tokens': len(prompt.split()),
-                            'completion_tokens': len(generated_text.split()),
-                            'total_tokens': len(prompt.split()) + len(generated_text.split())
-                        }
-                    }
+                    headers=self.auth_headers,
+                    data=body,
+                    timeout=60,
+                    stream=True
+                ) as response:
+                    if response.status_code == 503:
+                        # The loading notice isn't needed; release the connection before waiting
+                        response.close()
+                        if attempt < MAX_RETRIES - 1:
+                            # Sessions waiting on the same loading model shouldn't retry in lockstep
+                            wait_time = _backoff_delay(attempt, response.headers.get('Retry-After'), full_jitter=True)
+                            logger.warning(f"HF model {model_id} is loading (503). Retrying in {wait_time:.1f}s...")
+                            time.sleep(wait_time)
+                            continue
+                        else:
+                            return {}, "Model consistently unavailable after retries (503)"
                     
-                    # Update usage
-                    self.config.usage.prompt_tokens += standardized['usage']['prompt_tokens']
-                    self.config.usage.completion_tokens += standardized['usage']['completion_tokens']
-                    self.config.usage.total_tokens += standardized['usage']['total_tokens']
+                    if response.status_code != 200:
+                        return {}, f"HTTP {response.status_code}: {_short_body(response)}"
                     
-                    return standardized, None
-                else:
-                    return {}, "Unexpected response format"
+                    result = _json_loads(response.content)
+                    self._record_usage(request_count=1)
                     
+                    # Convert HF response to standard format
+                    if isinstance(result, list) and len(result) > 0:
+                        generated_text = result[0].get('generated_text', '')
+                        completion_tokens = len(generated_text.split())
+                        standardized = {
+                            'choices': [{
+                                'message': {
+                                    'content': generated_text,
+                                    'role': 'assistant'
+                                }
+                            }],
+                            'usage': {
+                                'prompt_tokens': prompt_tokens,
+                                'completion_tokens': completion_tokens,
+                                'total_tokens': prompt_tokens + completion_tokens
+                            }
+                        }
+                        
+                        # Update usage
+                        self._record_usage(**standardized['usage'])
+                        
+                        return standardized, None
+                    else:
+                        return {}, "Unexpected response format"
+                        
             except requests.exceptions.Timeout:
                 return {}, "Request timeout"
             except requests.exceptions.ConnectionError:
@@ -377,40 +768,91 @@ class HuggingFaceProvider(APIProvider):
 class TogetherAIProvider(APIProvider):
     """Together AI API provider"""
     
+    DEFAULT_CONFIG = ProviderConfig(
+        name="Together AI",
+        api_key_encrypted="",
+        base_url="https://api.together.xyz",
+        models_endpoint="v1/models",
+        chat_endpoint="v1/chat/completions",
+        headers={
+            "Content-Type": "application/json"
+        },
+        rate_limit=500,
+        token_limit=250000
+    )
+    
     def __init__(self, api_key: str = ""):
-        config = ProviderConfig(
-            name="Together AI",
-            api_key_encrypted="",
-            base_url="https://api.together.xyz",
-            models_endpoint="v1/models",
-            chat_endpoint="v1/chat/completions",
-            headers={
-                "Content-Type": "application/json"
-            },
-            rate_limit=500,
-            token_limit=250000
-        )
-        super().__init__(config)
+        super().__init__(self.default_config())
         if api_key:
             self.set_api_key(api_key)
 
+# Provider classes keyed by their config name, used to restore saved providers
+_PROVIDER_REGISTRY: Dict[str, type] = {
+    cls.DEFAULT_CONFIG.name: cls
+    for cls in (OpenRouterProvider, HuggingFaceProvider, TogetherAIProvider)
+}
+
+# Managers with a debounced save in flight; weak, so a session's manager can still be freed
+_pending_config_saves: "weakref.WeakSet[EnhancedTokenManager]" = weakref.WeakSet()
+
+@atexit.register
+def _flush_pending_config_saves():
+    """Write any debounced config save that hasn't landed yet at interpreter exit"""
+    for manager in list(_pending_config_saves):
+        manager.flush_config()
+
 class EnhancedTokenManager:
     """Enhanced token management system with persistence"""
     
     def __init__(self):
-        self.providers: List[APIProvider] = []
+        # Providers keyed by class (one per type, in rotation order) plus a name index
+        self._providers_by_type: Dict[type, APIProvider] = {}
+        self._provider_types_by_name: Dict[str, type] = {}
+        self._provider_list: Tuple[APIProvider, ...] = ()
+        # Rotation position by provider name, rebuilt with _provider_list
+        self._provider_index_by_name: Dict[str, int] = {}
         self.current_provider_index = 0
         self.config_file = os.path.expanduser("~/.token_manager_config.json")
+        
+        # Debounced config persistence
+        self._config_dirty = threading.Event()
+        self._config_write_lock = threading.Lock()
+        self._config_saver: Optional[threading.Thread] = None
+        # Last known config file bytes, keyed on (mtime_ns, size)
+        self._config_bytes: Optional[Tuple[Tuple[int, int], bytes]] = None
         self.load_config()
         self.load_from_env()
         
         # Auto-refresh settings
         self.auto_refresh_enabled = True
         self.auto_refresh_interval = 300  # 5 minutes default
-        self.last_auto_refresh = None
+        # Interval bookkeeping uses time.monotonic() so wall-clock jumps can't skew it
+        self.last_auto_refresh: Optional[float] = None
         self.refresh_in_progress = False
         self.cached_models = {}
-        self.cache_timestamp = None
+        self.cache_timestamp: Optional[float] = None
+        self._refresh_future: Optional[Future] = None
+    
+    @property
+    def providers(self) -> Tuple[APIProvider, ...]:
+        """Providers in rotation order, as a tuple; use add/remove_provider to change them"""
+        return self._provider_list
+    
+    def _store_provider(self, provider: APIProvider):
+        """Insert a provider at the end of the rotation, replacing any of the same type"""
+        provider_type = type(provider)
+        previous = self._providers_by_type.pop(provider_type, None)
+        if previous is not None:
+            self._provider_types_by_name.pop(previous.config.name, None)
+        self._providers_by_type[provider_type] = provider
+        self._provider_types_by_name[provider.config.name] = provider_type
+        self._rebuild_provider_list()
+    
+    def _rebuild_provider_list(self):
+        """Refresh the rotation list and its name index from _providers_by_type"""
+        # A tuple, so callers can't append to it behind the type and name indexes
+        self._provider_list = tuple(self._providers_by_type.values())
+        self._provider_index_by_name = {p.config.name: i for i, p in enumerate(self._provider_list)}
     
     def should_auto_refresh(self) -> bool:
         """Check if auto-refresh should run (non-blocking check)"""
@@ -423,91 +865,109 @@ class EnhancedTokenManager:
         if self.last_auto_refresh is None:
             return True
         
-        elapsed = (datetime.now() - self.last_auto_refresh).total_seconds()
-        return elapsed >= self.auto_refresh_interval
+        return time.monotonic() - self.last_auto_refresh >= self.auto_refresh_interval
+    
+    def submit_background(self, fn, *args) -> Future:
+        """Run a callable on the manager's shared background pool"""
+        return _get_background_executor().submit(fn, *args)
     
     def background_refresh_models(self) -> Dict[str, List[Dict]]:
-        """Background model refresh - non-blocking, returns cached on failure"""
-        if self.refresh_in_progress:
-            # Return cached data if refresh already in progress
-            return self.cached_models or {}
-        
-        try:
+        """Start a background model refresh if none is running; returns cached models immediately"""
+        if self._refresh_future is None or self._refresh_future.done():
             self.refresh_in_progress = True
-            
-            # Use ThreadPoolExecutor for timeout capability
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(self.get_all_models)
-                try:
-                    # Timeout after 10 seconds to avoid blocking
-                    models = future.result(timeout=10)
-                    if models:
-                        self.cached_models = models
-                        self.cache_timestamp = datetime.now()
-                        self.last_auto_refresh = datetime.now()
-                    return models or self.cached_models or {}
-                except FutureTimeoutError:
-                    logger.warning("Background model refresh timed out, using cached data")
-                    return self.cached_models or {}
+            self._refresh_future = self.submit_background(self._refresh_models)
+        return self.cached_models or {}
+    
+    def _refresh_models(self):
+        """Background job behind background_refresh_models"""
+        try:
+            # get_all_models enforces MODEL_FETCH_TIMEOUT itself and returns whatever finished
+            models = self.get_all_models()
+            if models:
+                self.cached_models = models
+                self.cache_timestamp = self.last_auto_refresh = time.monotonic()
         except Exception as e:
             logger.error(f"Background refresh error: {e}")
-            return self.cached_models or {}
         finally:
             self.refresh_in_progress = False
     
     def get_cached_models(self) -> Tuple[Dict[str, List[Dict]], bool]:
         """Get cached models with freshness indicator"""
         is_fresh = False
-        if self.cache_timestamp:
-            age = (datetime.now() - self.cache_timestamp).total_seconds()
-            is_fresh = age < 300  # Fresh if less than 5 minutes old
+        if self.cache_timestamp is not None:
+            is_fresh = time.monotonic() - self.cache_timestamp < 300  # Fresh if less than 5 minutes old
         
         return self.cached_models or {}, is_fresh
     
     def load_from_env(self):
         """Load API keys from environment variables"""
         env_keys = {
-            'OPENROUTER_API_KEY': OpenRouterProvider,
-            'HUGGINGFACE_API_KEY': HuggingFaceProvider,
-            'TOGETHER_API_KEY': TogetherAIProvider
+            'OPENROUTER_API_KEY': 'OpenRouter',
+            'HUGGINGFACE_API_KEY': 'Hugging Face',
+            'TOGETHER_API_KEY': 'Together AI'
         }
         
-        for env_var, provider_class in env_keys.items():
+        for env_var, provider_name in env_keys.items():
+            provider_class = _PROVIDER_REGISTRY[provider_name]
             api_key = os.getenv(env_var)
             if api_key:
                 # Check if provider already exists
-                existing = next((p for p in self.providers if isinstance(p, provider_class)), None)
-                if not existing:
+                if provider_class not in self._providers_by_type:
                     provider = provider_class(api_key)
-                    self.providers.append(provider)
+                    self._store_provider(provider)
                     logger.info(f"Loaded {provider.config.name} from environment variable {env_var}")
     
     def add_provider(self, provider: APIProvider):
         """Add a new provider to the rotation"""
-        # Remove existing provider of same type
-        self.providers = [p for p in self.providers if type(p) != type(provider)]
-        self.providers.append(provider)
+        # Replaces any existing provider of the same type
+        self._store_provider(provider)
         logger.info(f"Added provider: {provider.config.name}")
         self.save_config()
     
     def remove_provider(self, provider_name: str):
         """Remove provider by name"""
-        self.providers = [p for p in self.providers if p.config.name != provider_name]
+        provider_type = self._provider_types_by_name.pop(provider_name, None)
+        if provider_type is not None:
+            del self._providers_by_type[provider_type]
+            self._rebuild_provider_list()
+            # Keep the current index in range
+            if self.current_provider_index >= len(self._provider_list):
+                self.current_provider_index = max(0, len(self._provider_list) - 1)
         logger.info(f"Removed provider: {provider_name}")
         self.save_config()
     
+    def select_provider(self, provider_name: str) -> bool:
+        """Make the named provider current; False if no provider has that name"""
+        index = self._provider_index_by_name.get(provider_name)
+        if index is None:
+            return False
+        self.current_provider_index = index
+        self.save_config()
+        return True
+    
     def get_current_provider(self) -> Optional[APIProvider]:
         """Get currently active provider"""
-        if not self.providers:
+        providers = self.providers
+        count = len(providers)
+        if not count:
             return None
+        if count == 1:
+            # Common single-provider setup: nothing to rotate to
+            provider = providers[0]
+            return provider if provider.is_available() else None
         
-        for _ in range(len(self.providers)):
-            provider = self.providers[self.current_provider_index]
-            if provider.is_available():
+        # One pass from the current index with a single clock read; the index moves once, on a hit
+        now = time.monotonic()
+        start = self.current_provider_index
+        for offset in range(count):
+            index = (start + offset) % count
+            provider = providers[index]
+            if provider.is_available(now):
+                if index != start:
+                    self.current_provider_index = index
+                    logger.info(f"Rotated to provider: {provider.config.name}")
                 return provider
-            else:
-                logger.info(f"Provider {provider.config.name} unavailable, trying next...")
-                self.rotate_provider()
+            logger.info(f"Provider {provider.config.name} unavailable, trying next...")
         
         return None
     
@@ -525,6 +985,7 @@ class EnhancedTokenManager:
             return {}, "No providers available", None
         
         response, error = provider.send_chat(model_id, messages)
+        used_provider = provider
         
         if error and ("quota" in error.lower() or "429" in error or "402" in error):
             logger.warning(f"Provider {provider.config.name} quota exhausted, rotating...")
@@ -533,20 +994,47 @@ class EnhancedTokenManager:
             next_provider = self.get_current_provider()
             if next_provider and next_provider != provider:
                 response, error = next_provider.send_chat(model_id, messages)
-                return response, error, next_provider.config.name
+                used_provider = next_provider
         
-        return response, error, provider.config.name
+        # Usage counters (and maybe status) changed; the debounced saver coalesces these
+        self.save_config()
+        return response, error, used_provider.config.name
     
-    def get_all_models(self) -> Dict[str, List[Dict]]:
-        """Get models from all providers"""
+    def get_all_models(self, refresh: bool = False) -> Dict[str, List[Dict]]:
+        """Get models from all providers, fetching them concurrently
+        
+        Lists younger than each provider's MODELS_TTL are reused unless refresh is set.
+        """
         all_models = {}
-        for provider in self.providers:
-            if provider.config.status == ProviderStatus.ACTIVE and provider.api_key:
-                models, error = provider.get_models()
+        eligible = [
+            p for p in self.providers
+            if p.config.status == ProviderStatus.ACTIVE and p.api_key
+        ]
+        if not eligible:
+            return all_models
+        
+        executor = ThreadPoolExecutor(max_workers=min(8, len(eligible)))
+        try:
+            futures = [
+                (provider, executor.submit(provider.get_models_cached, refresh=refresh))
+                for provider in eligible
+            ]
+            deadline = time.monotonic() + MODEL_FETCH_TIMEOUT
+            # Collect in provider order so the model dropdown order stays stable
+            for provider, future in futures:
+                try:
+                    models, error = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                except FutureTimeoutError:
+                    error = f"timed out after {MODEL_FETCH_TIMEOUT:.0f}s"
+                except Exception as e:
+                    error = str(e)
                 if not error:
                     all_models[provider.config.name] = models
                 else:
                     logger.warning(f"Failed to get models for {provider.config.name}: {error}")
+        finally:
+            # Don't wait on stragglers past the deadline; they finish in the background
+            executor.shutdown(wait=False)
         return all_models
     
     def get_provider_status(self) -> List[Dict]:
@@ -555,49 +1043,129 @@ class EnhancedTokenManager:
         for provider in self.providers:
             status_list.append({
                 'name': provider.config.name,
-                'status': provider.config.status.value,
+                'status': _STATUS_VALUES[provider.config.status],
                 'requests': provider.config.usage.requests,
                 'tokens': provider.config.usage.total_tokens,
                 'rate_limit': provider.config.rate_limit,
                 'token_limit': provider.config.token_limit,
-                'has_key': bool(provider.api_key)
+                'has_key': provider.has_key
             })
         return status_list
     
+    def get_provider_status_columns(self) -> Dict[str, List[Any]]:
+        """Get status of all providers as column lists, ready for a DataFrame"""
+        providers = self.providers
+        return {
+            'name': [p.config.name for p in providers],
+            'status': [_STATUS_VALUES[p.config.status] for p in providers],
+            'requests': [p.config.usage.requests for p in providers],
+            'tokens': [p.config.usage.total_tokens for p in providers],
+            'rate_limit': [p.config.rate_limit for p in providers],
+            'token_limit': [p.config.token_limit for p in providers],
+            'has_key': [p.has_key for p in providers]
+        }
+    
     def save_config(self):
-        """Save configuration to file"""
+        """Schedule a debounced save of the configuration to file"""
+        with self._config_write_lock:
+            self._config_dirty.set()
+            if self._config_saver is None:
+                # The saver exits once nothing is pending, so idle managers hold no thread
+                self._config_saver = threading.Thread(
+                    target=self._config_save_loop,
+                    name="config-saver",
+                    daemon=True
+                )
+                self._config_saver.start()
+                _pending_config_saves.add(self)
+    
+    def flush_config(self):
+        """Write any pending configuration change immediately"""
+        with self._config_write_lock:
+            if self._config_dirty.is_set():
+                self._config_dirty.clear()
+                self._write_config()
+    
+    def _config_save_loop(self):
+        """Background loop coalescing bursts of save_config() calls into one write"""
+        while True:
+            time.sleep(CONFIG_SAVE_DEBOUNCE)
+            self.flush_config()
+            with self._config_write_lock:
+                # A save_config() that raced the flush re-set the flag; go around again
+                if not self._config_dirty.is_set():
+                    self._config_saver = None
+                    _pending_config_saves.discard(self)
+                    return
+    
+    def _write_config(self):
+        """Write configuration to file"""
         config_data = {
             'providers': [],
             'current_provider_index': self.current_provider_index
         }
         
         for provider in self.providers:
-            provider_data = asdict(provider.config)
-            # Convert datetime objects to strings
-            if provider_data['usage'] and provider_data['usage']['last_reset']:
-                provider_data['usage']['last_reset'] = provider_data['usage']['last_reset'].isoformat()
-            # Convert enum to string value
-            if isinstance(provider_data['status'], ProviderStatus):
-                provider_data['status'] = provider_data['status'].value
-            elif isinstance(provider_data['status'], str) and '.' in provider_data['status']:
-                # Handle already stringified enum like "ProviderStatus.ACTIVE"
-                provider_data['status'] = provider_data['status'].split('.')[-1].lower()
-            config_data['providers'].append(provider_data)
+            config_data['providers'].append(_config_to_dict(provider.config))
+        
+        payload = _json_dumps(config_data, default=str)
+        try:
+            # Compare with the file as it is now: another session (or an editor) may have rewritten it.
+            # An unchanged file is answered from _config_bytes after a stat, without a read
+            if self._read_config_bytes() == payload:
+                return
+        except OSError:
+            pass  # Unreadable; try the write anyway
         
+        tmp_file = None
         try:
-            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            with open(self.config_file, 'w') as f:
-                json.dump(config_data, f, indent=2, default=str)
-            os.chmod(self.config_file, 0o600)  # Restrict permissions
+            config_dir = os.path.dirname(self.config_file)
+            os.makedirs(config_dir, exist_ok=True)
+            # Write to a temp file and swap it in so a crash never leaves a torn config;
+            # the name is unique because every session's manager saves to the same file
+            fd, tmp_file = tempfile.mkstemp(
+                dir=config_dir, prefix=os.path.basename(self.config_file) + ".", suffix=".tmp"
+            )
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_file, 0o600)  # Restrict permissions
+            os.replace(tmp_file, self.config_file)
+            tmp_file = None
+            stat_result = os.stat(self.config_file)
+            self._config_bytes = ((stat_result.st_mtime_ns, stat_result.st_size), payload)
         except Exception as e:
             logger.error(f"Failed to save config: {e}")
+        finally:
+            if tmp_file is not None:
+                try:
+                    os.remove(tmp_file)
+                except OSError:
+                    pass
+    
+    def _read_config_bytes(self) -> Optional[bytes]:
+        """Return the config file contents, or None if it doesn't exist
+        
+        The bytes are kept alongside the file's (mtime_ns, size), so a reload of an
+        unchanged file (e.g. right after our own write) skips the disk read.
+        """
+        try:
+            stat_result = os.stat(self.config_file)
+        except FileNotFoundError:
+            return None
+        key = (stat_result.st_mtime_ns, stat_result.st_size)
+        if self._config_bytes is None or self._config_bytes[0] != key:
+            with open(self.config_file, 'rb') as f:
+                self._config_bytes = (key, f.read())
+        return self._config_bytes[1]
     
     def load_config(self):
         """Load configuration from file with backward compatibility"""
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    config_data = json.load(f)
+            raw_config = self._read_config_bytes()
+            if raw_config is not None:
+                config_data = _json_loads(raw_config)
                 
                 self.current_provider_index = config_data.get('current_provider_index', 0)
                 
@@ -609,8 +1177,7 @@ class EnhancedTokenManager:
                             usage_dict = provider_data['usage']
                             
                             # Remove any fields that are not in current TokenUsage dataclass
-                            valid_fields = {'prompt_tokens', 'completion_tokens', 'total_tokens', 'requests', 'last_reset'}
-                            usage_dict = {k: v for k, v in usage_dict.items() if k in valid_fields}
+                            usage_dict = {k: usage_dict[k] for k in usage_dict.keys() & _USAGE_FIELDS}
                             
                             # Convert string back to datetime
                             if usage_dict.get('last_reset'):
@@ -622,15 +1189,14 @@ class EnhancedTokenManager:
                         # Convert string status to enum with validation
                         if 'status' in provider_data and isinstance(provider_data['status'], str):
                             # Handle both "active" and "ProviderStatus.ACTIVE" formats
-                            status_str = provider_data['status'].split('.')[-1] if '.' in provider_data['status'] else provider_data['status']
+                            status_str = provider_data['status'].rpartition('.')[2].lower()
                             
-                            # Validate status value
-                            try:
-                                provider_data['status'] = ProviderStatus(status_str)
-                            except ValueError:
-                                # If invalid status, default to ACTIVE
+                            # Validate status value; if invalid, default to ACTIVE
+                            status = _STATUS_BY_VALUE.get(status_str)
+                            if status is None:
                                 logger.warning(f"Invalid status '{status_str}' for provider, defaulting to ACTIVE")
-                                provider_data['status'] = ProviderStatus.ACTIVE
+                                status = ProviderStatus.ACTIVE
+                            provider_data['status'] = status
                         
                         # Handle backward compatibility for api_key field
                         if 'api_key' in provider_data and 'api_key_encrypted' not in provider_data:
@@ -641,30 +1207,21 @@ class EnhancedTokenManager:
                             provider_data['api_key_encrypted'] = ""
                         
                         # Create provider based on name
-                        if provider_data['name'] == 'OpenRouter':
-                            provider = OpenRouterProvider()
-                        elif provider_data['name'] == 'Hugging Face':
-                            provider = HuggingFaceProvider()
-                        elif provider_data['name'] == 'Together AI':
-                            provider = TogetherAIProvider()
-                        elif provider_data['name'] == 'Exo Local':
-                            # Skip Exo Local if exo_provider is not available
-                            logger.info("Skipping Exo Local provider (requires exo_provider module)")
-                            continue
-                        else:
-                            logger.warning(f"Unknown provider type: {provider_data['name']}")
+                        provider_class = _PROVIDER_REGISTRY.get(provider_data['name'])
+                        if provider_class is None:
+                            if provider_data['name'] == 'Exo Local':
+                                # Skip Exo Local if exo_provider is not available
+                                logger.info("Skipping Exo Local provider (requires exo_provider module)")
+                            else:
+                                logger.warning(f"Unknown provider type: {provider_data['name']}")
                             continue
+                        provider = provider_class()
                         
                         # Restore config - only include fields that exist in ProviderConfig
-                        valid_config_fields = {
-                            'name', 'api_key_encrypted', 'base_url', 'models_endpoint', 
-                            'chat_endpoint', 'headers', 'rate_limit', 'token_limit', 
-                            'status', 'usage'
-                        }
-                        filtered_data = {k: v for k, v in provider_data.items() if k in valid_config_fields}
+                        filtered_data = {k: provider_data[k] for k in provider_data.keys() & _CONFIG_FIELDS}
                         
                         provider.config = ProviderConfig(**filtered_data)
-                        self.providers.append(provider)
+                        self._store_provider(provider)
                         
                     except Exception as e:
                         logger.error(f"Failed to restore provider {provider_data.get('name', 'unknown')}: {e}")
@@ -672,6 +1229,308 @@ class EnhancedTokenManager:
         except Exception as e:
             logger.error(f"Failed to load config: {e}")
 
+@lru_cache(maxsize=1)
+def get_manager() -> EnhancedTokenManager:
+    """Get a process-wide EnhancedTokenManager shared by the CLI diagnostics"""
+    return EnhancedTokenManager()
+
+if not st.runtime.exists():
+    # Imported by the CLI tools; st.cache_data would warn once per decorator about the missing runtime
+    logging.getLogger("streamlit.runtime.caching.cache_data_api").setLevel(logging.ERROR)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _build_provider_df(signature: Tuple[Tuple[str, Tuple[Any, ...]], ...]):
+    """Build the Status tab DataFrame, cached on the provider status columns"""
+    import numpy as np
+    import pandas as pd
+    
+    columns = dict(signature)
+    
+    def percent(used, limit):
+        # One vectorized pass; a zero limit reads as 0% instead of inf/NaN
+        used = np.asarray(used, dtype=np.float64)
+        limit = np.asarray(limit, dtype=np.float64)
+        out = np.zeros_like(used)
+        np.divide(used * 100.0, limit, out=out, where=limit > 0)
+        return out.round(2).astype(np.float32)
+    
+    columns['usage_percent'] = percent(columns['tokens'], columns['token_limit'])
+    columns['request_percent'] = percent(columns['requests'], columns['rate_limit'])
+    
+    # Built column-wise from the status columns; float32 halves the percentage bytes sent to Arrow
+    df = pd.DataFrame(columns, copy=False)
+    
+    # Status takes a handful of values, so Arrow ships it dictionary-encoded
+    df['status'] = df['status'].astype('category')
+    for column in ('requests', 'rate_limit', 'tokens', 'token_limit'):
+        df[column] = pd.to_numeric(df[column], downcast='unsigned')
+    return df
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _build_usage_chart(signature: Tuple[Tuple[str, Tuple[Any, ...]], ...]):
+    """Build the grouped usage chart once per distinct provider status signature"""
+    import altair as alt
+    
+    df = _build_provider_df(signature)
+    usage_long = df[['name', 'usage_percent', 'request_percent']].melt(
+        'name', var_name='metric', value_name='percent'
+    )
+    return alt.Chart(usage_long).mark_bar().encode(
+        x=alt.X('name:N', title=None),
+        y=alt.Y('percent:Q', title="% of limit"),
+        color='metric:N',
+        xOffset='metric:N'
+    )
+
+@st.cache_data(ttl=2, show_spinner=False)
+def _config_mtime(path: str) -> Optional[float]:
+    """Stat the config file at most once every two seconds; None when it doesn't exist"""
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def _read_config_file(path: str, mtime: float) -> str:
+    """Read the raw config file text; mtime is part of the cache key so edits invalidate it
+    
+    Only the newest version is worth keeping: the config is rewritten after every chat request.
+    """
+    with open(path, 'r') as f:
+        return f.read()
+
+@st.cache_resource(show_spinner="Loading documentation...")
+def _get_rag_index():
+    """Load and index the documentation once per process; sessions only read it afterwards"""
+    rag = SimpleRAG()
+    rag.load_documents()
+    return rag
+
+def _model_options(all_models: Dict[str, List[Dict]]) -> List[str]:
+    """Chat dropdown labels, rebuilt only when a refresh replaces the all_models dict"""
+    # Keyed on identity: the dict is swapped out wholesale on refresh, never mutated in place
+    memo = st.session_state.get('model_options_memo')
+    if memo is None or memo[0] is not all_models:
+        options = [
+            f"[{provider_name}] {model.get('id', model.get('name', 'unknown'))}"
+            for provider_name, models in all_models.items()
+            for model in models
+        ]
+        memo = (all_models, options)
+        st.session_state.model_options_memo = memo
+    return memo[1]
+
+@st.fragment
+def _render_status_tab(token_manager: EnhancedTokenManager):
+    """Status tab; runs as a fragment so its own widgets don't rerun the whole app"""
+    st.header("Provider Status")
+    
+    # Refresh button; clicking it reruns just this fragment, which re-reads the status
+    st.button("🔄 Refresh Status")
+    
+    # Status table; the empty case never touches pandas
+    if not token_manager.providers:
+        st.info("No providers configured")
+    else:
+        status_columns = token_manager.get_provider_status_columns()
+        
+        # Reruns that don't change any counters reuse the cached frame
+        signature = tuple((column, tuple(values)) for column, values in status_columns.items())
+        df = _build_provider_df(signature)
+        
+        # Only one page of rows is serialized to the browser per rerun
+        page_df = df
+        if len(df) > STATUS_PAGE_SIZE:
+            page = st.number_input("Page", min_value=0, max_value=(len(df) - 1) // STATUS_PAGE_SIZE, value=0)
+            page_df = df.iloc[page * STATUS_PAGE_SIZE:(page + 1) * STATUS_PAGE_SIZE]
+        
+        # column_order projects the full frame without a df[[...]] copy
+        st.dataframe(
+            page_df,
+            use_container_width=True,
+            hide_index=True,
+            column_order=STATUS_DISPLAY_COLUMNS,
+            column_config={
+                'usage_percent': st.column_config.NumberColumn("usage %", format="%.2f"),
+                'request_percent': st.column_config.NumberColumn("request %", format="%.2f")
+            }
+        )
+        
+        # One grouped chart: a single payload and a single Vega layout
+        st.subheader("Token & Request Usage")
+        st.altair_chart(_build_usage_chart(signature), use_container_width=True)
+
+@st.fragment(run_every=MODEL_REFRESH_POLL_INTERVAL)
+def _watch_model_refresh():
+    """Poll a chat-tab model refresh by rerunning only itself, then rerun the app once it lands"""
+    refresh_future = st.session_state.get('model_refresh_future')
+    if refresh_future is None or refresh_future.done():
+        # The chat tab collects the result and updates the model list on the full rerun
+        st.rerun()
+
+def _show_earlier_chat():
+    """Widen the rendered chat window by one page"""
+    st.session_state.chat_window += CHAT_HISTORY_WINDOW
+
+@st.fragment
+def _render_chat_tab(token_manager: EnhancedTokenManager):
+    """Chat tab; a fragment, so sending a message doesn't rerun the sidebar and other tabs"""
+    st.header("Chat Interface")
+    
+    # Provider selection and model refresh
+    col1, col2, col3 = st.columns([2, 2, 1])
+    
+    with col1:
+        # Provider selector in chat tab
+        current_provider = token_manager.get_current_provider()
+        if token_manager.providers:
+            provider_names = [p.config.name for p in token_manager.providers]
+            current_name = current_provider.config.name if current_provider else provider_names[0]
+            
+            selected_chat_provider = st.selectbox(
+                "Provider",
+                provider_names,
+                index=provider_names.index(current_name) if current_name in provider_names else 0,
+                key="chat_provider_selector",
+                help="Select provider for chat"
+            )
+            
+            # Switch if changed
+            if selected_chat_provider != current_name and token_manager.select_provider(selected_chat_provider):
+                st.session_state.config_dirty = True
+                st.rerun()
+    
+    with col2:
+        # Check for cached models and show freshness
+        cached_models, is_fresh = token_manager.get_cached_models()
+        
+        button_label = "🔄 Refresh Models"
+        if cached_models:
+            if is_fresh:
+                button_label = "🔄 Refresh (auto-updated)"
+            else:
+                button_label = "🔄 Refresh (outdated)"
+        
+        if st.button(button_label, use_container_width=True):
+            # Fetch in the background so the page stays responsive
+            if 'model_refresh_future' not in st.session_state:
+                st.session_state.model_refresh_future = token_manager.submit_background(
+                    token_manager.get_all_models, True
+                )
+                # One full rerun so main() starts the _watch_model_refresh poller next to this tab
+                st.rerun()
+        
+        refresh_future = st.session_state.get('model_refresh_future')
+        if refresh_future is not None:
+            if refresh_future.done():
+                del st.session_state.model_refresh_future
+                try:
+                    models = refresh_future.result()
+                    st.session_state.all_models = models
+                    token_manager.cached_models = models
+                    token_manager.cache_timestamp = time.monotonic()
+                    if models:
+                        st.success(f"✓ Loaded {sum(len(m) for m in models.values())} models")
+                    else:
+                        st.warning("No models loaded - check API keys and provider status")
+                except Exception as e:
+                    st.error(f"Error loading models: {e}")
+            else:
+                st.caption("⏳ Loading models in background...")
+        
+        # Use cached models if available and no manual refresh
+        if 'all_models' not in st.session_state and cached_models:
+            st.session_state.all_models = cached_models
+    
+    with col3:
+        # Rotate provider button
+        if st.button("🔀 Next", help="Switch to next provider", use_container_width=True):
+            token_manager.rotate_provider()
+            token_manager.save_config()
+            st.session_state.config_dirty = True
+            st.rerun()
+    
+    # Model dropdown
+    all_models = getattr(st.session_state, 'all_models', {})
+    model_options = _model_options(all_models)
+    
+    selected_model = st.selectbox(
+        "Select Model",
+        model_options if model_options else ["No models available - click Refresh Models"],
+        help="Select a model to chat with"
+    )
+    
+    # Current provider info
+    current_provider = token_manager.get_current_provider()
+    if current_provider:
+        key_status = "🔑 Key configured" if current_provider.has_key else "❌ No API key"
+        st.info(f"**Current Provider:** {current_provider.config.name} | {key_status}")
+    else:
+        st.warning("⚠️ No active providers available - add a provider in the sidebar")
+    
+    # Chat interface; history entries are (role, content, metadata) tuples, metadata may be None
+    st.session_state.setdefault('chat_history', [])
+    st.session_state.setdefault('chat_window', CHAT_HISTORY_WINDOW)
+    
+    # Display only the most recent messages; older ones are revealed on request
+    chat_history = st.session_state.chat_history
+    hidden = len(chat_history) - st.session_state.chat_window
+    if hidden > 0:
+        # A callback widens the window before this rerun computes what is hidden
+        st.button(f"⬆️ Show earlier ({hidden} hidden)", key="chat_show_earlier", on_click=_show_earlier_chat)
+    for role, content, metadata in islice(chat_history, max(hidden, 0), None):
+        with st.chat_message(role):
+            st.write(content)
+            if metadata:
+                st.caption(metadata)
+    
+    # Chat input
+    if prompt := st.chat_input("Type your message here..."):
+        if selected_model and not selected_model.startswith("No models"):
+            # Extract model ID
+            model_id = selected_model.split('] ', 1)[-1]
+            
+            # Add user message to history
+            st.session_state.chat_history.append(("user", prompt, None))
+            
+            # Display user message
+            with st.chat_message("user"):
+                st.write(prompt)
+            
+            # Get AI response
+            with st.chat_message("assistant"):
+                with st.spinner("Thinking..."):
+                    messages = [{"role": "user", "content": prompt}]
+                    response, error, provider_name = token_manager.send_request(model_id, messages)
+                    st.session_state.config_dirty = True
+                    
+                    if error:
+                        st.error(f"Error: {error}")
+                        st.session_state.chat_history.append(
+                            ("assistant", f"Error: {error}", f"Provider: {provider_name or 'Unknown'}")
+                        )
+                    else:
+                        content = response.get('choices', [{}])[0].get('message', {}).get('content', 'No response')
+                        usage = response.get('usage', {})
+                        
+                        st.write(content)
+                        
+                        metadata = f"Provider: {provider_name}"
+                        if usage:
+                            metadata += f" | Tokens: {usage.get('total_tokens', 0)}"
+                        
+                        st.caption(metadata)
+                        
+                        st.session_state.chat_history.append(("assistant", content, metadata))
+        else:
+            st.warning("Please select a valid model first")
+    
+    # Clear chat button
+    if st.button("🗑️ Clear Chat"):
+        st.session_state.chat_history = []
+        st.session_state.chat_window = CHAT_HISTORY_WINDOW
+        st.rerun()
+
 # Streamlit GUI
 def main():
     """Streamlit GUI for the Enhanced Multi-Provider Token Manager"""
@@ -692,16 +1551,16 @@ def main():
     if 'last_interaction' not in st.session_state:
         st.session_state.last_interaction = datetime.now()
     
+    # Set by every UI path that changes provider state; cleared on save/reload
+    st.session_state.setdefault('config_dirty', False)
+    
     token_manager = st.session_state.token_manager
     token_manager.auto_refresh_enabled = st.session_state.auto_refresh_enabled
     
     # Non-blocking background auto-refresh (runs in background, never blocks UI)
     if token_manager.should_auto_refresh():
-        # Trigger background refresh without blocking
-        threading.Thread(
-            target=token_manager.background_refresh_models,
-            daemon=True
-        ).start()
+        # Submits to the manager's background pool and returns without blocking
+        token_manager.background_refresh_models()
     
     st.title("🤖 Enhanced Multi-Provider Token Manager")
     
@@ -723,7 +1582,7 @@ def main():
         with st.expander("Add New Provider", expanded=False):
             provider_type = st.selectbox(
                 "Provider Type",
-                ["OpenRouter", "Hugging Face", "Together AI"]
+                list(_PROVIDER_REGISTRY)
             )
             
             api_key = st.text_input(
@@ -735,14 +1594,9 @@ def main():
             if st.button("Add Provider", type="primary"):
                 if api_key:
                     try:
-                        if provider_type == "OpenRouter":
-                            provider = OpenRouterProvider(api_key)
-                        elif provider_type == "Hugging Face":
-                            provider = HuggingFaceProvider(api_key)
-                        elif provider_type == "Together AI":
-                            provider = TogetherAIProvider(api_key)
-                        
+                        provider = _PROVIDER_REGISTRY[provider_type](api_key)
                         token_manager.add_provider(provider)
+                        st.session_state.config_dirty = True
                         st.success(f"Added {provider_type} provider successfully!")
                         st.rerun()
                     except Exception as e:
@@ -774,13 +1628,10 @@ def main():
             )
             
             # Switch provider if changed
-            if selected_provider != current_name:
-                for i, p in enumerate(token_manager.providers):
-                    if p.config.name == selected_provider:
-                        token_manager.current_provider_index = i
-                        token_manager.save_config()
-                        st.success(f"Switched to {selected_provider}")
-                        st.rerun()
+            if selected_provider != current_name and token_manager.select_provider(selected_provider):
+                st.session_state.config_dirty = True
+                st.success(f"Switched to {selected_provider}")
+                st.rerun()
             
             st.divider()
         
@@ -789,17 +1640,11 @@ def main():
                 col1, col2, col3 = st.columns([2, 1, 1])
                 
                 with col1:
-                    status_color = {
-                        'active': '🟢',
-                        'exhausted': '🟡',
-                        'error': '🔴',
-                        'disabled': '⚪'
-                    }
                     key_indicator = "🔑" if provider['has_key'] else "❌"
                     # Show if this is the current provider
                     is_current = (idx == token_manager.current_provider_index)
                     current_marker = " ⭐" if is_current else ""
-                    st.write(f"{status_color.get(provider['status'], '⚪')} {key_indicator} **{provider['name']}**{current_marker}")
+                    st.write(f"{STATUS_INDICATORS.get(provider['status'], '⚪')} {key_indicator} **{provider['name']}**{current_marker}")
                 
                 with col2:
                     st.write(f"Req: {provider['requests']}/{provider['rate_limit']}")
@@ -807,17 +1652,10 @@ def main():
                 with col3:
                     if st.button("Remove", key=f"remove_{provider['name']}_{idx}"):
                         try:
-                            # Find and remove the provider
-                            for i, p in enumerate(token_manager.providers):
-                                if p.config.name == provider['name']:
-                                    token_manager.providers.pop(i)
-                                    # Adjust current index if needed
-                                    if token_manager.current_provider_index >= len(token_manager.providers):
-                                        token_manager.current_provider_index = max(0, len(token_manager.providers) - 1)
-                                    token_manager.save_config()
-                                    st.success(f"Removed {provider['name']}")
-                                    st.rerun()
-                                    break
+                            token_manager.remove_provider(provider['name'])
+                            st.session_state.config_dirty = True
+                            st.success(f"Removed {provider['name']}")
+                            st.rerun()
                         except Exception as e:
                             st.error(f"Failed to remove provider: {e}")
         
@@ -834,191 +1672,13 @@ def main():
     tab1, tab2, tab3, tab4 = st.tabs(["💬 Chat", "📊 Status", "🔧 Settings", "🤖 AI Assistant"])
     
     with tab1:
-        st.header("Chat Interface")
-        
-        # Provider selection and model refresh
-        col1, col2, col3 = st.columns([2, 2, 1])
-        
-        with col1:
-            # Provider selector in chat tab
-            current_provider = token_manager.get_current_provider()
-            if token_manager.providers:
-                provider_names = [p.config.name for p in token_manager.providers]
-                current_name = current_provider.config.name if current_provider else provider_names[0]
-                
-                selected_chat_provider = st.selectbox(
-                    "Provider",
-                    provider_names,
-                    index=provider_names.index(current_name) if current_name in provider_names else 0,
-                    key="chat_provider_selector",
-                    help="Select provider for chat"
-                )
-                
-                # Switch if changed
-                if selected_chat_provider != current_name:
-                    for i, p in enumerate(token_manager.providers):
-                        if p.config.name == selected_chat_provider:
-                            token_manager.current_provider_index = i
-                            token_manager.save_config()
-                            st.rerun()
-        
-        with col2:
-            # Check for cached models and show freshness
-            cached_models, is_fresh = token_manager.get_cached_models()
-            
-            button_label = "🔄 Refresh Models"
-            if cached_models:
-                if is_fresh:
-                    button_label = "🔄 Refresh (auto-updated)"
-                else:
-                    button_label = "🔄 Refresh (outdated)"
-            
-            if st.button(button_label, use_container_width=True):
-                with st.spinner("Loading models..."):
-                    try:
-                        models = token_manager.get_all_models()
-                        st.session_state.all_models = models
-                        token_manager.cached_models = models
-                        token_manager.cache_timestamp = datetime.now()
-                        if models:
-                            st.success(f"✓ Loaded {sum(len(m) for m in models.values())} models")
-                        else:
-                            st.warning("No models loaded - check API keys and provider status")
-                    except Exception as e:
-                        st.error(f"Error loading models: {e}")
-            
-            # Use cached models if available and no manual refresh
-            if 'all_models' not in st.session_state and cached_models:
-                st.session_state.all_models = cached_models
-        
-        with col3:
-            # Rotate provider button
-            if st.button("🔀 Next", help="Switch to next provider", use_container_width=True):
-                token_manager.rotate_provider()
-                token_manager.save_config()
-                st.rerun()
-        
-        # Model dropdown
-        all_models = getattr(st.session_state, 'all_models', {})
-        model_options = []
-        for provider_name, models in all_models.items():
-            for model in models:
-                model_id = model.get('id', model.get('name', 'unknown'))
-                model_options.append(f"[{provider_name}] {model_id}")
-        
-        selected_model = st.selectbox(
-            "Select Model",
-            model_options if model_options else ["No models available - click Refresh Models"],
-            help="Select a model to chat with"
-        )
-        
-        # Current provider info
-        current_provider = token_manager.get_current_provider()
-        if current_provider:
-            key_status = "🔑 Key configured" if current_provider.api_key else "❌ No API key"
-            st.info(f"**Current Provider:** {current_provider.config.name} | {key_status}")
-        else:
-            st.warning("⚠️ No active providers available - add a provider in the sidebar")
-        
-        # Chat interface
-        if 'chat_history' not in st.session_state:
-            st.session_state.chat_history = []
-        
-        # Display chat history
-        for message in st.session_state.chat_history:
-            with st.chat_message(message["role"]):
-                st.write(message["content"])
-                if "metadata" in message:
-                    st.caption(message["metadata"])
-        
-        # Chat input
-        if prompt := st.chat_input("Type your message here..."):
-            if selected_model and not selected_model.startswith("No models"):
-                # Extract model ID
-                model_id = selected_model.split('] ', 1)[-1]
-                
-                # Add user message to history
-                st.session_state.chat_history.append({
-                    "role": "user", 
-                    "content": prompt
-                })
-                
-                # Display user message
-                with st.chat_message("user"):
-                    st.write(prompt)
-                
-                # Get AI response
-                with st.chat_message("assistant"):
-                    with st.spinner("Thinking..."):
-                        messages = [{"role": "user", "content": prompt}]
-                        response, error, provider_name = token_manager.send_request(model_id, messages)
-                        
-                        if error:
-                            st.error(f"Error: {error}")
-                            st.session_state.chat_history.append({
-                                "role": "assistant",
-                                "content": f"Error: {error}",
-                                "metadata": f"Provider: {provider_name or 'Unknown'}"
-                            })
-                        else:
-                            content = response.get('choices', [{}])[0].get('message', {}).get('content', 'No response')
-                            usage = response.get('usage', {})
-                            
-                            st.write(content)
-                            
-                            metadata = f"Provider: {provider_name}"
-                            if usage:
-                                metadata += f" | Tokens: {usage.get('total_tokens', 0)}"
-                            
-                            st.caption(metadata)
-                            
-                            st.session_state.chat_history.append({
-                                "role": "assistant",
-                                "content": content,
-                                "metadata": metadata
-                            })
-            else:
-                st.warning("Please select a valid model first")
-        
-        # Clear chat button
-        if st.button("🗑️ Clear Chat"):
-            st.session_state.chat_history = []
-            st.rerun()
+        _render_chat_tab(token_manager)
+        # Only rendered while a manual model refresh is in flight
+        if 'model_refresh_future' in st.session_state:
+            _watch_model_refresh()
     
     with tab2:
-        st.header("Provider Status")
-        
-        # Refresh button
-        if st.button("🔄 Refresh Status"):
-            st.rerun()
-        
-        # Status table
-        providers = token_manager.get_provider_status()
-        
-        if providers:
-            import pandas as pd
-            
-            df = pd.DataFrame(providers)
-            df['usage_percent'] = (df['tokens'] / df['token_limit'] * 100).round(2)
-            df['request_percent'] = (df['requests'] / df['rate_limit'] * 100).round(2)
-            
-            st.dataframe(
-                df[['name', 'status', 'has_key', 'requests', 'rate_limit', 'tokens', 'token_limit', 'usage_percent', 'request_percent']],
-                use_container_width=True
-            )
-            
-            # Charts
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("Token Usage")
-                st.bar_chart(df.set_index('name')['usage_percent'])
-            
-            with col2:
-                st.subheader("Request Usage") 
-                st.bar_chart(df.set_index('name')['request_percent'])
-        else:
-            st.info("No providers configured")
+        _render_status_tab(token_manager)
     
     with tab3:
         st.header("Settings")
@@ -1058,15 +1718,15 @@ def main():
                 st.success(f"Interval set to {refresh_interval//60} minutes")
         
         # Show auto-refresh status
-        if token_manager.last_auto_refresh:
-            time_since = (datetime.now() - token_manager.last_auto_refresh).total_seconds()
+        if token_manager.last_auto_refresh is not None:
+            time_since = time.monotonic() - token_manager.last_auto_refresh
             next_refresh_in = max(0, token_manager.auto_refresh_interval - time_since)
             
             st.info(f"""
             **Auto-refresh status:**
             - Last refresh: {int(time_since//60)} minutes ago
             - Next refresh: in {int(next_refresh_in//60)} minutes
-            - Cache: {'Fresh ✓' if token_manager.cache_timestamp and (datetime.now() - token_manager.cache_timestamp).total_seconds() < 300 else 'Outdated'}
+            - Cache: {'Fresh ✓' if token_manager.get_cached_models()[1] else 'Outdated'}
             """)
         else:
             st.info("Auto-refresh will run soon...")
@@ -1078,27 +1738,39 @@ def main():
         st.code(f"Config file: {token_manager.config_file}")
         
         # Export/Import functionality
-        col1, col2 = st.columns(2)
+        # Both actions share one form so a submit costs exactly one rerun
+        with st.form("config_actions", border=False):
+            col1, col2 = st.columns(2)
+            with col1:
+                save_clicked = st.form_submit_button("💾 Save Configuration")
+            with col2:
+                reload_clicked = st.form_submit_button("🔄 Reload Configuration")
         
-        with col1:
-            if st.button("💾 Save Configuration"):
+        if save_clicked:
+            if st.session_state.config_dirty:
                 token_manager.save_config()
+                token_manager.flush_config()
+                st.session_state.config_dirty = False
                 st.success("Configuration saved!")
+            else:
+                st.info("Nothing to save")
         
-        with col2:
-            if st.button("🔄 Reload Configuration"):
-                token_manager.load_config()
-                token_manager.load_from_env()
-                st.success("Configuration reloaded!")
+        if reload_clicked:
+            token_manager.load_config()
+            token_manager.load_from_env()
+            st.session_state.config_dirty = False
+            st.success("Configuration reloaded!")
         
         # Debug info
         st.subheader("Debug Information")
-        with st.expander("View Raw Configuration"):
+        # An expander body runs even when collapsed; a checkbox skips the stat and read entirely
+        if st.checkbox("View Raw Configuration", key="show_raw_config"):
             try:
-                if os.path.exists(token_manager.config_file):
-                    with open(token_manager.config_file, 'r') as f:
-                        config_data = json.load(f)
-                    st.json(config_data)
+                config_mtime = _config_mtime(token_manager.config_file)
+                if config_mtime is not None:
+                    # st.json takes the JSON text as-is, so there is no parse/re-dump round trip
+                    raw_config = _read_config_file(token_manager.config_file, config_mtime)
+                    st.json(raw_config)
                 else:
                     st.info("No configuration file found")
             except Exception as e:
@@ -1111,15 +1783,9 @@ def main():
             st.warning("⚠️ RAG Assistant not available. The rag_assistant.py module is required.")
             st.info("The assistant uses documentation to answer questions about setup, usage, and troubleshooting.")
         else:
-            # Initialize RAG system
-            if 'rag_system' not in st.session_state:
-                with st.spinner("Loading documentation..."):
-                    st.session_state.rag_system = SimpleRAG()
-                    st.session_state.rag_system.load_documents()
-                    st.session_state.rag_assistant = EnhancedRAGAssistant(
-                        st.session_state.rag_system,
-                        token_manager
-                    )
+            # The documentation index is shared process-wide; the assistant wraps this session's manager
+            if 'rag_assistant' not in st.session_state:
+                st.session_state.rag_assistant = EnhancedRAGAssistant(_get_rag_index(), token_manager)
             
             rag_assistant = st.session_state.rag_assistant
             
@@ -1198,7 +1864,7 @@ def main():
                 
                 # Show sources
                 with st.expander("📚 View Sources"):
-                    results = st.session_state.rag_system.search(question, top_k=3)
+                    results = rag_assistant.rag.search(question, top_k=3)
                     for i, (doc, score) in enumerate(results, 1):
                         st.markdown(f"**Source {i}:** {doc.source} (relevance: {score:.1f})")
                         st.text(doc.content[:300] + "..." if len(doc.content) > 300 else doc.content)
@@ -1210,23 +1876,21 @@ def main():
             # Documentation stats
             st.divider()
             with st.expander("📊 Documentation Stats"):
-                if 'rag_system' in st.session_state:
-                    rag = st.session_state.rag_system
-                    st.metric("Indexed Documents", len(rag.documents))
-                    st.metric("Unique Keywords", len(rag.index))
-                    
-                    # Show document sources
-                    sources = {}
-                    for doc in rag.documents:
-                        sources[doc.source] = sources.get(doc.source, 0) + 1
-                    
-                    st.write("**Sources:**")
-                    for source, count in sorted(sources.items()):
-                        st.write(f"- {source}: {count} chunks")
+                rag = rag_assistant.rag
+                st.metric("Indexed Documents", len(rag.documents))
+                st.metric("Unique Keywords", len(rag.index))
+                
+                # Show document sources
+                sources = Counter(doc.source for doc in rag.documents)
+                
+                st.write("**Sources:**")
+                for source, count in sorted(sources.items()):
+                    st.write(f"- {source}: {count} chunks")
 
 if __name__ == "__main__":
     try:
         main()
-    except Exception as e:
+    except (RuntimeError, OSError, json.JSONDecodeError) as e:
+        # OSError covers ConnectionError and requests' RequestException; programming errors surface as-is
         st.error(f"Application error: {e}")
-        logger.error(f"Application error: {e}", exc_info=True)
\ No newline at end of file
+        logger.exception("Application error")
\ No newline at end of file
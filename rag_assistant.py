@@ -14,6 +14,9 @@ from dataclasses import dataclass
 from pathlib import Path
 import re
 
+# Distinct queries whose rankings SimpleRAG.search keeps
+RANKING_CACHE_SIZE = 128
+
 @dataclass
 class Document:
     """Represents a document chunk for RAG"""
@@ -32,6 +35,7 @@ class SimpleRAG:
         self.docs_dir = Path(docs_dir)
         self.documents: List[Document] = []
         self.index: Dict[str, List[int]] = {}  # keyword -> document indices
+        self._rankings: Dict[str, List[Tuple[int, float]]] = {}  # query -> ranked (doc index, score)
         
     def load_documents(self):
         """Load and index all documentation files"""
@@ -131,6 +135,8 @@ class SimpleRAG:
     
     def _add_to_index(self, doc: Document, doc_idx: int):
         """Add document keywords to inverted index"""
+        # Rankings computed against the old index are stale now
+        self._rankings.clear()
         keywords = self._extract_keywords(doc.content)
         
         for keyword in keywords:
@@ -155,6 +161,18 @@ class SimpleRAG:
     
     def search(self, query: str, top_k: int = 5) -> List[Tuple[Document, float]]:
         """Search for relevant documents"""
+        # The full ranking is kept per query, so repeat searches (any top_k) are a slice
+        ranking = self._rankings.get(query)
+        if ranking is None:
+            ranking = self._rank(query)
+            if len(self._rankings) >= RANKING_CACHE_SIZE:
+                self._rankings.clear()
+            self._rankings[query] = ranking
+        
+        return [(self.documents[idx], score) for idx, score in ranking[:top_k]]
+    
+    def _rank(self, query: str) -> List[Tuple[int, float]]:
+        """Score every matching document for a query, best first"""
         query_keywords = self._extract_keywords(query)
         
         # Score documents based on keyword matches
@@ -174,11 +192,8 @@ class SimpleRAG:
                     scores[doc_idx] = 0
                 scores[doc_idx] += 5
         
-        # Sort by score and return top results
-        sorted_results = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:top_k]
-        
-        results = [(self.documents[idx], score) for idx, score in sorted_results]
-        return results
+        # Sort by score; the sort is stable, so any top_k is a prefix of this
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)
     
     def get_context(self, query: str, max_tokens: int = 2000) -> str:
         """Get relevant context for a query"""
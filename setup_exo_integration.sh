@@ -50,7 +50,7 @@ cd "$TOKEN_MANAGER_DIR"
 # Create requirements file if not exists
 cat > exo_requirements.txt << EOF
 requests>=2.31.0
-streamlit>=1.28.0
+streamlit>=1.37.0
 plotly>=5.17.0
 aiohttp>=3.9.0
 numpy>=1.24.0
@@ -77,6 +77,7 @@ def smoke_test():
     try:
         # Save config
         manager.save_config()
+        manager.flush_config()
         print(f"   ✓ Config saved")
         
         # Check file exists
@@ -36,6 +36,7 @@ def test_enum_bug_fix():
     
     print("\n2️⃣  Testing save config...")
     manager.save_config()
+    manager.flush_config()
     print("   ✓ Config saved")
     
     print("\n3️⃣  Testing load config...")
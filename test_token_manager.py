@@ -70,6 +70,177 @@ def test_provider_config():
     
     return True
 
+# Test provider default configuration
+def test_provider_defaults():
+    """Test that providers copy their class-level default config"""
+    print("\n🧩 Testing provider defaults...")
+    
+    sys.path.insert(0, os.path.dirname(__file__))
+    from enhanced_multi_provider_manager import OpenRouterProvider
+    
+    defaults = OpenRouterProvider.DEFAULT_CONFIG
+    provider = OpenRouterProvider()
+    
+    assert provider.config.name == defaults.name, "Name should come from defaults"
+    assert provider.config is not defaults, "Config must not be shared"
+    assert provider.config.headers is not defaults.headers, "Headers must not be shared"
+    assert provider.config.usage is not defaults.usage, "Usage must not be shared"
+    print(f"   ✓ {defaults.name} instance owns its config")
+    
+    provider.config.usage.requests += 1
+    assert defaults.usage.requests == 0, "Defaults should be unaffected by usage"
+    print("   ✓ Class defaults unaffected by instance usage")
+    
+    return True
+
+# Test rate-limit window reset
+def test_rate_limit_window():
+    """Test that usage resets once the rate-limit window has passed"""
+    print("\n⏱️  Testing rate-limit window...")
+    
+    sys.path.insert(0, os.path.dirname(__file__))
+    from enhanced_multi_provider_manager import TogetherAIProvider, TokenUsage
+    from datetime import datetime, timedelta
+    
+    provider = TogetherAIProvider()
+    limit = provider.config.rate_limit
+    
+    provider.config.usage = TokenUsage(requests=limit, last_reset=datetime.now() - timedelta(minutes=5))
+    assert not provider.is_available(), "Provider at its rate limit should be unavailable"
+    print("   ✓ Rate limit enforced inside the window")
+    
+    provider.config.usage = TokenUsage(requests=limit, last_reset=datetime.now() - timedelta(hours=2))
+    assert provider.is_available(), "Expired window should reset usage"
+    assert provider.config.usage.requests == 0, "Request counter should be reset"
+    print("   ✓ Usage reset after the window expired")
+    
+    return True
+
+# Test on-disk model list cache
+def test_models_cache():
+    """Test that get_models_cached serves fresh results from memory and from disk"""
+    print("\n🗄️  Testing model list cache...")
+    
+    sys.path.insert(0, os.path.dirname(__file__))
+    import enhanced_multi_provider_manager as manager_module
+    
+    calls = []
+    provider = manager_module.TogetherAIProvider("key-a")
+    provider.get_models = lambda: (calls.append(1) or [{"id": "test-model"}], None)
+    
+    original_dir = manager_module.MODELS_CACHE_DIR
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager_module.MODELS_CACHE_DIR = temp_dir
+        try:
+            first, _ = provider.get_models_cached()
+            second, _ = provider.get_models_cached()
+            assert first == second == [{"id": "test-model"}], "Cached models mismatch!"
+            assert len(calls) == 1, "Fresh cache should skip the fetch"
+            print("   ✓ Second call served from memory")
+            
+            # A fresh provider has no in-memory copy, so this has to come from the file
+            fresh = manager_module.TogetherAIProvider("key-a")
+            fresh.get_models = lambda: (calls.append(1) or [], "should not fetch")
+            from_disk, error = fresh.get_models_cached()
+            assert error is None and from_disk == first, "Fresh cache file should be read back"
+            assert len(calls) == 1, "Fresh cache file should skip the fetch"
+            assert not [f for f in os.listdir(temp_dir) if f.endswith(".tmp")], "Temp file left behind"
+            print("   ✓ New provider served from disk")
+            
+            # Another key must not be handed the first key's list
+            other = manager_module.TogetherAIProvider("key-b")
+            other.get_models = lambda: ([], "Invalid API key")
+            models, error = other.get_models_cached()
+            assert error == "Invalid API key" and models == [], "Cache must be per API key"
+            provider.set_api_key("key-b")
+            models, error = provider.get_models_cached()
+            assert len(calls) == 2, "A changed key should miss the in-memory cache"
+            print("   ✓ Cache is per API key")
+            
+            provider.get_models_cached(refresh=True)
+            assert len(calls) == 3, "refresh=True should bypass the cache"
+            print("   ✓ refresh=True bypasses cache")
+        finally:
+            manager_module.MODELS_CACHE_DIR = original_dir
+    
+    return True
+
+def test_request_backoff():
+    """Test that make_request retries a transient 429 before giving up on the provider"""
+    print("\n🔁 Testing request backoff...")
+    
+    sys.path.insert(0, os.path.dirname(__file__))
+    import enhanced_multi_provider_manager as manager_module
+    
+    class FakeResponse:
+        def __init__(self, status_code, payload=None):
+            self.status_code = status_code
+            self.headers = {'Retry-After': '0'} if status_code == 429 else {}
+            self.content = json.dumps(payload).encode()
+        
+        def __enter__(self):
+            return self
+        
+        def __exit__(self, *exc_info):
+            self.close()
+        
+        def close(self):
+            pass
+    
+    class FakeSession:
+        def __init__(self, responses):
+            self.responses = list(responses)
+            self.posts = 0
+        
+        def post(self, *args, **kwargs):
+            self.posts += 1
+            response = self.responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+    
+    provider = manager_module.TogetherAIProvider("test-key")
+    provider._session = FakeSession([FakeResponse(429), FakeResponse(200, {"choices": []})])
+    result, error = provider.make_request("v1/chat/completions", {})
+    assert error is None and result == {"choices": []}, "429 should be retried"
+    assert provider.config.status == manager_module.ProviderStatus.ACTIVE, "Retried 429 must not exhaust"
+    print("   ✓ Transient 429 retried")
+    
+    provider._session = FakeSession([FakeResponse(429)] * manager_module.REQUEST_MAX_ATTEMPTS)
+    result, error = provider.make_request("v1/chat/completions", {})
+    assert error and provider.config.status == manager_module.ProviderStatus.EXHAUSTED, "Persistent 429 should exhaust"
+    print("   ✓ Persistent 429 marks provider exhausted")
+    
+    # The deadline is saved with the config, so a restarted app still sees the cooldown end
+    saved = manager_module._config_to_dict(provider.config)
+    assert saved['status'] == "exhausted" and saved['cooldown_until'] is not None, "Cooldown should be saved"
+    print("   ✓ Cooldown deadline saved with the config")
+    
+    # Retry-After was 0, so the cooldown is already over
+    assert provider.is_available(), "Provider should return after its cooldown"
+    assert provider.config.status == manager_module.ProviderStatus.ACTIVE
+    print("   ✓ Provider rejoins rotation after the cooldown")
+    
+    # The body was sent before a read timeout, so retrying could bill the completion twice
+    session = FakeSession([manager_module.requests.exceptions.ReadTimeout()] * manager_module.REQUEST_MAX_ATTEMPTS)
+    provider._session = session
+    result, error = provider.make_request("v1/chat/completions", {})
+    assert error == "Request timeout" and session.posts == 1, "Read timeout must not be retried"
+    print("   ✓ Read timeout returned without a retry")
+    
+    backoff_base = manager_module.BACKOFF_BASE
+    manager_module.BACKOFF_BASE = 0.0
+    try:
+        session = FakeSession([manager_module.requests.exceptions.ConnectTimeout(), FakeResponse(200, {"choices": []})])
+        provider._session = session
+        result, error = provider.make_request("v1/chat/completions", {})
+    finally:
+        manager_module.BACKOFF_BASE = backoff_base
+    assert error is None and session.posts == 2, "Connect timeout should be retried"
+    print("   ✓ Connect timeout retried")
+    
+    return True
+
 # Test file operations
 def test_file_operations():
     """Test configuration file operations"""
@@ -183,6 +354,10 @@ def run_all_tests():
         ("Imports", test_imports),
         ("Encryption", test_encryption),
         ("Provider Config", test_provider_config),
+        ("Provider Defaults", test_provider_defaults),
+        ("Rate Limit Window", test_rate_limit_window),
+        ("Models Cache", test_models_cache),
+        ("Request Backoff", test_request_backoff),
         ("File Operations", test_file_operations),
         ("Manager Import", test_manager_import),
         ("API Endpoints", test_api_endpoints),